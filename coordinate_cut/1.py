@@ -1,17 +1,6 @@
 import cv2
-import numpy as np
-from skimage.morphology import skeletonize
 import matplotlib.pyplot as plt
-
-def extract_skeleton(binary_img):
-    skeleton = skeletonize(binary_img // 255)
-    skeleton = (skeleton * 255).astype(np.uint8)
-    return skeleton
-
-def get_skeleton_points(skeleton_img):
-    ys, xs = np.where(skeleton_img > 0)
-    points = list(zip(xs, ys))
-    return points
+from roi_crop import extract_skeleton_roi
 
 def select_endpoints(points, interval=200):
     """
@@ -70,11 +59,9 @@ def main(mask_img_path, save_img_path, save_txt_path):
     binary_img = cv2.imread(mask_img_path, cv2.IMREAD_GRAYSCALE)
     _, binary_img = cv2.threshold(binary_img, 127, 255, cv2.THRESH_BINARY)
 
-    # 骨架化
-    skeleton = extract_skeleton(binary_img)
-
-    # 提取骨架点
-    points = get_skeleton_points(skeleton)
+    # 骨架化（仅在各前景分量的外接框内进行），并提取骨架点（坐标已偏移回整图）
+    skeleton, points = extract_skeleton_roi(binary_img)
+    points = [tuple(p) for p in points]
 
     # 每interval选取端点（以骨架左端点为原点）
     selected_points, offset = select_endpoints(points, interval=200)
@@ -13,6 +13,19 @@ def triangle_height(a, b, c):
     h = (2 * S) / c
     return h
 
+def triangle_heights(a, b, c):
+    """
+    批量版本：a, b, c 为可广播的数组，返回高 h 及有效掩膜 valid
+    不满足三角不等式（或 c <= 0）的三角形不抛出异常，对应 h 为 nan
+    """
+    a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (a, b, c)))
+    s = (a + b + c) / 2
+    S_square = s * (s - a) * (s - b) * (s - c)
+    valid = (c > 0) & (S_square >= 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = 2 * np.sqrt(np.where(valid, S_square, np.nan)) / c
+    return h, valid
+
 if __name__ == "__main__":
     a = 11.6
     b = 18.16
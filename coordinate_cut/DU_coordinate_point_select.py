@@ -2,6 +2,7 @@ import cv2
 import numpy as np
 from skimage.morphology import skeletonize
 import matplotlib.pyplot as plt
+from coordinate_frame import get_coordinate_system
 
 
 def extract_skeleton(binary_img):
@@ -121,12 +122,12 @@ def save_points_txt(points, save_txt_path):
     print(f"坐标已保存至 {save_txt_path}")
 
 
-def main(rgb_img_path, mask_img_path, save_img_path, save_txt_path):
+def main(rgb_img_path, mask_img_path, save_img_path, save_txt_path, frame_path=None):
     rgb_img = cv2.cvtColor(cv2.imread(rgb_img_path), cv2.COLOR_BGR2RGB)
     height, width = rgb_img.shape[:2]
 
-    # 1. 定义坐标系（原点自动在宽度中线上）
-    origin, x_dir, y_dir = define_coordinate_system(rgb_img)
+    # 1. 定义坐标系（原点自动在宽度中线上；frame_path 已保存时直接复用）
+    origin, x_dir, y_dir, _ = get_coordinate_system(rgb_img, define_coordinate_system, frame_path)
 
     # 2. 读取并预处理二值图
     binary_img = cv2.imread(mask_img_path, cv2.IMREAD_GRAYSCALE)
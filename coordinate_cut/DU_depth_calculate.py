@@ -1,5 +1,9 @@
+import csv
+
 import numpy as np
 
+from table_io import load_table
+
 def triangle_vertex_coordinates(a, b, c):
     """
     计算已知三边长三角形的三个顶点坐标
@@ -19,13 +23,59 @@ def point_to_vertex_distance_on_edge(c, x_t, y_t, positions):
     计算边c上不同位置点到对角顶点的距离
     positions: 边c上的点的x坐标数组
     """
-    distances = []
-    for x_p in positions:
-        dx = x_t - x_p
-        dy = y_t - 0
-        d = np.sqrt(dx**2 + dy**2)
-        distances.append(d)
-    return distances
+    # 所有位置一次广播计算
+    return np.hypot(x_t - np.asarray(positions, dtype=np.float64), y_t)
+
+def triangle_vertex_coordinates_batch(a, b, c):
+    """
+    批量版本：a, b, c 为可广播的数组，返回顶点 A 的坐标 x, y 及有效掩膜 valid
+    不满足三角不等式（或 c <= 0）的三角形不抛出异常，valid 为 False，x, y 为 nan
+    y 即顶点到边 c 的高
+    """
+    a, b, c = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (a, b, c)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = (a**2 + c**2 - b**2) / (2 * c)
+        y_square = a**2 - x**2
+    valid = (c > 0) & (y_square >= 0)
+    x = np.where(valid, x, np.nan)
+    y = np.sqrt(np.where(valid, y_square, np.nan))
+    return x, y, valid
+
+def crack_depth_batch(a, b, c, specimen, positions):
+    """
+    多个试件、多个裂纹前缘位置的深度计算，一次完成
+    a, b, c:   (P, ) 各试件三角形三边长
+    specimen:  (N, ) 每个位置所属试件的下标
+    positions: (N, ) 边 c 上的位置 x 坐标
+    返回 dict: x_t, y_t (=高), valid 为 (P, )；distances 为 (N, )，所属三角形无效时为 nan
+    """
+    x_t, y_t, valid = triangle_vertex_coordinates_batch(a, b, c)
+    specimen = np.asarray(specimen, dtype=np.int64)
+    distances = np.hypot(x_t[specimen] - np.asarray(positions, dtype=np.float64), y_t[specimen])
+    return {'x_t': x_t, 'y_t': y_t, 'valid': valid, 'distances': distances}
+
+def crack_depth_from_tables(triangles_path, positions_path, save_csv_path):
+    """
+    从表格读取并批量计算，结果写成一张表
+    triangles_path: 每行一个试件，前三列为 a, b, c
+    positions_path: 每行一个位置，前两列为 试件行号（从 0 开始）, 位置 x
+    输出: specimen, position, x_t, y_t, distance, valid
+    """
+    triangles, _ = load_table(triangles_path)
+    positions, _ = load_table(positions_path)
+    specimen = positions[:, 0].astype(np.int64)
+    result = crack_depth_batch(triangles[:, 0], triangles[:, 1], triangles[:, 2], specimen, positions[:, 1])
+
+    with open(save_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['specimen', 'position', 'x_t', 'y_t', 'distance', 'valid'])
+        writer.writerows(zip(specimen.tolist(), positions[:, 1].tolist(), result['x_t'][specimen].tolist(),
+                             result['y_t'][specimen].tolist(), result['distances'].tolist(),
+                             result['valid'][specimen].astype(int).tolist()))
+    n_invalid = int((~result['valid']).sum())
+    print(f"{len(triangles)} 个试件、{len(specimen)} 个位置的深度已保存到 {save_csv_path}，"
+          f"其中 {n_invalid} 个试件不满足三角不等式")
+    return result
 
 if __name__ == "__main__":
     a = 11.6
@@ -1,51 +1,11 @@
 import cv2
 import numpy as np
-from skimage.morphology import skeletonize
 import matplotlib.pyplot as plt
-
-def extract_skeleton(binary_img):
-    skeleton = skeletonize(binary_img // 255)
-    skeleton = (skeleton * 255).astype(np.uint8)
-    return skeleton
-
-def get_skeleton_points(skeleton_img):
-    ys, xs = np.where(skeleton_img > 0)
-    points = list(zip(xs, ys))
-    return points
-
-def select_endpoints(points, origin, x_dir, y_dir, interval=200):
-    """
-    使用点击定义的坐标系，计算每个骨架点在该坐标系下的 (x', y')，并每 interval 选取一个端点
-    确保末端点也被记录
-    """
-    if len(points) == 0:
-        return []
-
-    # 计算所有点在新坐标系下的投影
-    transformed = []
-    for x, y in points:
-        vec = np.array([x, y]) - origin
-        x_new = np.dot(vec, x_dir)
-        y_new = np.dot(vec, y_dir)
-        transformed.append((x_new, y_new))
-
-    # 按 x_new 排序
-    transformed.sort(key=lambda p: p[0])
-
-    selected = []
-    last_selected_x = -1e9  # 初始化为足够小，保证第一个点被选
-
-    for x_new, y_new in transformed:
-        if x_new - last_selected_x >= interval:
-            selected.append((x_new, y_new))
-            last_selected_x = x_new
-
-    # 确保末端也记录
-    if len(selected) == 0 or transformed[-1] != selected[-1]:
-        selected.append(transformed[-1])
-
-    return selected
-
+from roi_crop import extract_skeleton_roi
+from endpoint_selection import select_endpoints, select_endpoints_along_path, select_endpoints_native
+from coordinate_frame import frame_sidecar_path, get_coordinate_system
+from calibration import (calibration_keys, register_scale, save_mm_points, scale_for_image,
+                         scale_from_reference)
 
 def draw_points_on_image(img, points, origin, x_dir, y_dir):
     """
@@ -150,31 +110,50 @@ def click_two_points_and_measure_distance(rgb_img):
 # 其余函数 extract_skeleton, get_skeleton_points, select_endpoints, draw_points_on_image,
 # save_points_txt, define_coordinate_system 与之前保持一致，这里省略
 
-def main(rgb_img_path, mask_img_path, save_img_path, save_txt_path):
+def main(rgb_img_path, mask_img_path, save_img_path, save_txt_path, sampling='projection',
+         frame_path=None, headless=False, auto_frame=False, native_resolution=False, subpixel=False,
+         reference_mm=None, calibration_path=None):
     # 读取 RGB 原图
     rgb_img = cv2.cvtColor(cv2.imread(rgb_img_path), cv2.COLOR_BGR2RGB)
     height, width = rgb_img.shape[:2]
 
-    # 【新增功能】点击两点计算像素距离
-    distance = click_two_points_and_measure_distance(rgb_img)
-    # 如果需要，可将 distance 保存或用于后续计算
-
-    # 1. 手动点击建立坐标系
-    origin, x_dir, y_dir = define_coordinate_system(rgb_img)
-
-    # 2. 读取 mask 二值图，并resize到RGB图尺寸
+    # 【新增功能】点击两点计算像素距离（无界面模式跳过）
+    if not headless:
+        distance = click_two_points_and_measure_distance(rgb_img)
+        # 给出参考长度时，将该距离换算为 mm/px 登记到标定注册表（键为图像文件名）
+        if reference_mm is not None and calibration_path is not None:
+            register_scale(calibration_path, calibration_keys(rgb_img_path)[0],
+                           scale_from_reference(distance, reference_mm),
+                           pixel_distance=float(distance), reference_mm=float(reference_mm))
+
+    # 1. 建立坐标系（frame_path 已保存时直接复用；auto_frame 时自动检测焊趾线，置信度低再手动点击；
+    #    未给定 frame_path 时，点击结果保存到图像旁的坐标系文件，无界面模式默认读取该文件）
+    origin, x_dir, y_dir, _ = get_coordinate_system(rgb_img, define_coordinate_system, frame_path, headless,
+                                                    auto=auto_frame, default_path=frame_sidecar_path(rgb_img_path))
+
+    # 2. 读取 mask 二值图
     binary_img = cv2.imread(mask_img_path, cv2.IMREAD_GRAYSCALE)
-    binary_img_resized = cv2.resize(binary_img, (width, height), interpolation=cv2.INTER_NEAREST)
-    _, binary_img_resized = cv2.threshold(binary_img_resized, 127, 255, cv2.THRESH_BINARY)
-
-    # 3. 骨架化
-    skeleton = extract_skeleton(binary_img)
-
-    # 4. 提取骨架点
-    points = get_skeleton_points(skeleton)
-
-    # 5. 每interval选取端点（使用坐标系转换）
-    selected_points = select_endpoints(points, origin, x_dir, y_dir, interval=200)
+    if native_resolution:
+        # 3-5. 在 mask 原始分辨率下骨架化并选取端点，端点坐标解析换算到RGB图坐标；
+        #      骨架图只在绘制时放大到RGB图尺寸
+        _, binary_img = cv2.threshold(binary_img, 127, 255, cv2.THRESH_BINARY)
+        skeleton, selected_points = select_endpoints_native(binary_img, (height, width), origin, x_dir, y_dir,
+                                                            interval=200, sampling=sampling, subpixel=subpixel)
+        skeleton = cv2.resize(skeleton, (width, height), interpolation=cv2.INTER_NEAREST)
+    else:
+        # resize到RGB图尺寸
+        binary_img_resized = cv2.resize(binary_img, (width, height), interpolation=cv2.INTER_NEAREST)
+        _, binary_img_resized = cv2.threshold(binary_img_resized, 127, 255, cv2.THRESH_BINARY)
+
+        # 3. 骨架化（仅在各前景分量的外接框内进行）
+        # 4. 提取骨架点（坐标已偏移回整图）
+        skeleton, points = extract_skeleton_roi(binary_img)
+
+        # 5. 每interval选取端点（使用坐标系转换；'arc_length' 时沿主骨架线按弧长采样）
+        if sampling == 'arc_length':
+            selected_points = select_endpoints_along_path(skeleton, origin, x_dir, y_dir, interval=200)
+        else:
+            selected_points = select_endpoints(points, origin, x_dir, y_dir, interval=200)
 
     # 6. 在图像上绘制端点
     img_with_points = draw_points_on_image(skeleton, selected_points, origin, x_dir, y_dir)
@@ -185,12 +164,19 @@ def main(rgb_img_path, mask_img_path, save_img_path, save_txt_path):
 
     save_points_txt(selected_points, save_txt_path)
 
-    # 8. 可视化
-    plt.figure(figsize=(10,5))
-    plt.imshow(cv2.cvtColor(img_with_points, cv2.COLOR_BGR2RGB))
-    plt.title("Skeleton with Endpoints in Custom Coordinate System")
-    plt.axis('off')
-    plt.show()
+    # 按标定注册表（图像 > 工况目录）查找 mm/px，整体换算为毫米另存为 *_mm.txt
+    if calibration_path is not None:
+        mm_per_px = scale_for_image(calibration_path, rgb_img_path)
+        mm_path = save_mm_points(save_txt_path, mm_per_px)
+        print(f"毫米坐标已保存至 {mm_path}")
+
+    # 8. 可视化（无界面模式跳过）
+    if not headless:
+        plt.figure(figsize=(10,5))
+        plt.imshow(cv2.cvtColor(img_with_points, cv2.COLOR_BGR2RGB))
+        plt.title("Skeleton with Endpoints in Custom Coordinate System")
+        plt.axis('off')
+        plt.show()
 
 if __name__ == '__main__':
     rgb_img_path = r"C:\Users\GHB\Desktop\test_dataset\TransUNet\frame_00252.jpg"
@@ -0,0 +1,134 @@
+import glob
+import json
+import os
+
+import numpy as np
+
+from text_revised import multiply_values_in_txt_array
+
+# 原先 text_revised 中写死的像素-毫米换算系数，注册表中找不到对应条目时使用
+DEFAULT_MM_PER_PX = 0.012537
+
+
+def load_registry(registry_path):
+    """
+    读取标定注册表 {键: {'mm_per_px': ..., ...}}，文件不存在时返回空表
+    键可以是相机、工况（目录名）或单张图像（文件名）
+    """
+    if registry_path is None or not os.path.exists(registry_path):
+        return {}
+    with open(registry_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_registry(registry_path, registry):
+    with open(registry_path, 'w', encoding='utf-8') as f:
+        json.dump(registry, f, indent=2, ensure_ascii=False)
+
+
+def scale_from_reference(pixel_distance, reference_mm):
+    """
+    由参考长度（如点击的两点或已知尺寸的特征）计算每像素毫米数
+    """
+    if pixel_distance <= 0:
+        raise ValueError("参考距离的像素长度必须大于 0")
+    return reference_mm / pixel_distance
+
+
+def register_scale(registry_path, key, mm_per_px, **info):
+    """
+    写入（或覆盖）一条标定，info 中可记录来源，如 pixel_distance、reference_mm
+    """
+    registry = load_registry(registry_path)
+    registry[key] = {'mm_per_px': float(mm_per_px), **info}
+    save_registry(registry_path, registry)
+    print(f"标定 {key}: {mm_per_px:.6f} mm/px 已保存至 {registry_path}")
+    return registry
+
+
+def calibration_keys(img_path, camera=None):
+    """
+    按优先级排列的查找键：图像文件名（去扩展名）、所在目录名（工况）、相机
+    """
+    keys = [os.path.splitext(os.path.basename(img_path))[0],
+            os.path.basename(os.path.dirname(os.path.abspath(img_path)))]
+    if camera is not None:
+        keys.append(camera)
+    return keys
+
+
+def lookup_scale(registry, keys, default=DEFAULT_MM_PER_PX):
+    """
+    依次用 keys 查找标定，全部未命中时返回 default
+    """
+    for key in keys:
+        if key in registry:
+            return registry[key]['mm_per_px']
+    return default
+
+
+def scale_for_image(registry_path, img_path, camera=None, default=DEFAULT_MM_PER_PX):
+    return lookup_scale(load_registry(registry_path), calibration_keys(img_path, camera), default)
+
+
+def mm_txt_path(save_txt_path, suffix='_mm'):
+    base, ext = os.path.splitext(save_txt_path)
+    return f"{base}{suffix}{ext}"
+
+
+def save_mm_points(txt_path, mm_per_px, out_path=None, suffix='_mm'):
+    """
+    将已保存的像素坐标文件整体换算为毫米另存（默认 *_mm.txt）
+    坐标流程的 main 与 rescale_point_files 都通过这里写出，格式一致（保留6位小数）
+    返回输出文件路径
+    """
+    out_path = out_path or mm_txt_path(txt_path, suffix)
+    multiply_values_in_txt_array(txt_path, out_path, mm_per_px)
+    return out_path
+
+
+def apply_scale(points, mm_per_px):
+    """
+    整个点数组一次换算为毫米
+    """
+    return np.asarray(points, dtype=np.float64) * mm_per_px
+
+
+def point_file_keys(txt_path, camera=None):
+    """
+    坐标文件的查找键：DSC00200_points -> DSC00200_points, DSC00200，再加目录名与相机
+    """
+    stem = os.path.splitext(os.path.basename(txt_path))[0]
+    parts = stem.split('_')
+    keys = ['_'.join(parts[:i]) for i in range(len(parts), 0, -1)]
+    return keys + calibration_keys(txt_path, camera)[1:]
+
+
+def rescale_point_files(registry_path, input_dir, output_dir=None, pattern='*_points.txt', suffix='_mm', camera=None):
+    """
+    按注册表重新换算整个数据集的像素坐标文件，无需重新骨架化
+    每个文件按 point_file_keys 查找各自的标定；输出文件名加 suffix
+
+    返回: {文件路径: 使用的 mm_per_px}
+    """
+    registry = load_registry(registry_path)
+    output_dir = output_dir or input_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    used = {}
+    for txt_path in sorted(glob.glob(os.path.join(input_dir, pattern))):
+        base, ext = os.path.splitext(os.path.basename(txt_path))
+        mm_per_px = lookup_scale(registry, point_file_keys(txt_path, camera))
+        save_mm_points(txt_path, mm_per_px, os.path.join(output_dir, f"{base}{suffix}{ext}"))
+        used[txt_path] = mm_per_px
+    print(f"共换算 {len(used)} 个坐标文件，结果已保存到 {output_dir}")
+    return used
+
+
+if __name__ == "__main__":
+    registry_path = r"C:\Users\GHB\Desktop\test_dataset\calibration.json"
+
+    # 由参考点击（如 DU_weld_distance 中量得的像素距离）登记某一工况的标定
+    register_scale(registry_path, 'TransUNet', scale_from_reference(797.6, 10.0), pixel_distance=797.6, reference_mm=10.0)
+
+    rescale_point_files(registry_path, r"C:\Users\GHB\Desktop\test_dataset\TransUNet")
@@ -0,0 +1,170 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+def frame_sidecar_path(img_path):
+    """
+    图像对应的坐标系文件路径：与图像同目录，文件名加 _frame.json 后缀
+    """
+    base, _ = os.path.splitext(img_path)
+    return f"{base}_frame.json"
+
+
+def save_coordinate_frame(frame_path, origin, x_dir, y_dir, rotation_deg=0.0):
+    """
+    保存点击得到的原点、坐标轴方向及 rotate_coordinate_system 使用的旋转角度
+    frame_path 可以是单张图像的文件，也可以是同一相机/工况共用的文件
+    """
+    frame = {
+        'origin': [float(v) for v in origin],
+        'x_dir': [float(v) for v in x_dir],
+        'y_dir': [float(v) for v in y_dir],
+        'rotation_deg': float(rotation_deg),
+    }
+    with open(frame_path, 'w', encoding='utf-8') as f:
+        json.dump(frame, f, indent=2)
+    print(f"坐标系已保存至 {frame_path}")
+
+
+def load_coordinate_frame(frame_path):
+    with open(frame_path, 'r', encoding='utf-8') as f:
+        frame = json.load(f)
+    return (np.array(frame['origin']), np.array(frame['x_dir']), np.array(frame['y_dir']),
+            frame.get('rotation_deg', 0.0))
+
+
+def estimate_coordinate_system(rgb_img, max_side=1024, canny_thresholds=(50, 150), angle_tol=3.0, offset_tol=None):
+    """
+    自动检测焊趾/肋边等主导直线作为 x 轴，无需点击
+    在金字塔降采样后的图像上做 Canny 边缘检测与概率霍夫变换：
+    先按线段长度加权统计方向，取主方向；再在主方向的线段中按法向偏移聚类，取总长度最大的一条直线，
+    最后用该直线上线段端点的主成分方向精修
+    offset_tol: 同一条直线上线段法向偏移的最大跨度（降采样图像素），默认为图像长边的 1%
+    返回 origin, x_dir, y_dir, confidence
+        origin:     该直线最左端点（原图坐标）
+        x_dir:      沿直线、指向图像右侧的单位向量；y_dir 为 x 逆时针旋转 90°，与手动点击的约定一致
+        confidence: min(该直线上的线段长度占全部霍夫线段长度的比例, 线段沿直线覆盖的长度占直线在图像内长度的比例)，
+                    前者排除纹理中大量杂乱线段的情况，后者排除短的偶然线段；检测不到直线时为 0
+    """
+    gray = cv2.cvtColor(rgb_img, cv2.COLOR_RGB2GRAY)
+    scale = 1.0
+    while max(gray.shape) > max_side:
+        gray = cv2.pyrDown(gray)
+        scale *= 2.0
+
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), *canny_thresholds)
+    lines = cv2.HoughLinesP(edges, 1, np.pi / 180, threshold=50,
+                            minLineLength=max(gray.shape) // 8, maxLineGap=10)
+    if lines is None:
+        return None, None, None, 0.0
+
+    segs = lines.reshape(-1, 4).astype(np.float64)
+    p0, p1 = segs[:, :2], segs[:, 2:]
+    length = np.hypot(*(p1 - p0).T)
+    angle = np.degrees(np.arctan2(p1[:, 1] - p0[:, 1], p1[:, 0] - p0[:, 0])) % 180.0
+
+    # 按长度加权的方向直方图（1° 一格，首尾相接），三角窗平滑后取峰值
+    hist = np.bincount(angle.astype(int) % 180, weights=length, minlength=180)
+    half = int(angle_tol)
+    smoothed = sum((half + 1 - abs(k)) * np.roll(hist, k) for k in range(-half, half + 1))
+    peak = np.argmax(smoothed) + 0.5
+    aligned = np.abs((angle - peak + 90.0) % 180.0 - 90.0) <= angle_tol
+
+    # 主方向：对倍角求加权平均，避免 0°/180° 处的跳变
+    theta = 0.5 * np.arctan2((length[aligned] * np.sin(np.radians(2 * angle[aligned]))).sum(),
+                             (length[aligned] * np.cos(np.radians(2 * angle[aligned]))).sum())
+    y_dir = np.array([-np.sin(theta), np.cos(theta)])
+
+    # 主方向线段按法向偏移排序后依次分组，与组内第一条线段的偏移相差超过 offset_tol 时另起一组，
+    # 保证每组的总跨度不超过 offset_tol（密集的平行纹理不会首尾相连成一组）；取总长度最大的一组作为焊趾线
+    if offset_tol is None:
+        offset_tol = max(gray.shape) / 100.0
+    idx = np.flatnonzero(aligned)
+    offset = ((p0[idx] + p1[idx]) / 2) @ y_dir
+    order = np.argsort(offset)
+    group = np.zeros(len(order), dtype=int)
+    start, current = offset[order[0]], 0
+    for i, value in enumerate(offset[order]):
+        if value - start > offset_tol:
+            start, current = value, current + 1
+        group[i] = current
+    best = np.argmax(np.bincount(group, weights=length[idx[order]]))
+    on_line = idx[order][group == best]
+
+    # 用该组线段端点（按长度加权）的主成分方向精修 x 轴
+    ends = np.vstack((p0[on_line], p1[on_line]))
+    weights = np.concatenate((length[on_line], length[on_line]))
+    center = np.average(ends, axis=0, weights=weights)
+    cov = np.cov((ends - center).T, aweights=weights)
+    x_dir = np.linalg.eigh(cov)[1][:, -1]
+    if x_dir[0] < 0 or (x_dir[0] == 0 and x_dir[1] < 0):
+        x_dir = -x_dir
+    y_dir = np.array([-x_dir[1], x_dir[0]])
+
+    along = (ends - center) @ x_dir
+    origin = center + along.min() * x_dir
+
+    # 线段在直线上的投影区间取并集，与直线穿过图像的长度相比
+    t0 = np.minimum((p0[on_line] - center) @ x_dir, (p1[on_line] - center) @ x_dir)
+    t1 = np.maximum((p0[on_line] - center) @ x_dir, (p1[on_line] - center) @ x_dir)
+    t_order = np.argsort(t0)
+    reach = np.maximum.accumulate(t1[t_order])
+    covered = reach[-1] - t0[t_order[0]] - np.clip(t0[t_order[1:]] - reach[:-1], 0, None).sum()
+    size = np.array(gray.shape[::-1], dtype=np.float64) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bounds = np.sort(np.stack((-center / x_dir, (size - center) / x_dir)), axis=0)
+    chord = np.nanmin(bounds[1]) - np.nanmax(bounds[0])
+    coverage = covered / chord if chord > 0 else 0.0
+    share = length[on_line].sum() / length.sum()
+    confidence = float(min(share, coverage, 1.0))
+
+    # 降采样图像素中心映射回原图
+    origin = (origin + 0.5) * scale - 0.5
+    return origin, x_dir, y_dir, confidence
+
+
+def get_coordinate_system(rgb_img, define_fn, frame_path=None, headless=False, rotation_deg=0.0,
+                          auto=False, min_confidence=0.5, default_path=None):
+    """
+    获取坐标系：frame_path 已存在时直接复用，不弹出窗口；
+    auto=True 时先用 estimate_coordinate_system 自动检测，置信度不低于 min_confidence 才采用
+    （自动检测的 x 轴已沿焊趾线，旋转角度记为 0）；
+    否则调用 define_fn(rgb_img) 手动点击，并在给定 frame_path 时保存供以后复用
+    headless:     无界面模式，需要手动点击时报错而不是等待点击
+    default_path: 未给定 frame_path 时使用的文件（通常为 frame_sidecar_path(图像路径)）：
+                  无界面模式从该文件读取；交互模式仍然点击（或自动检测），结果保存到该文件，
+                  之后同一图像的无界面运行无需额外参数即可复用
+    返回 origin, x_dir, y_dir, rotation_deg
+    """
+    if frame_path is None and default_path is not None:
+        if headless:
+            frame_path = default_path
+        else:
+            origin, x_dir, y_dir, rotation_deg = get_coordinate_system(rgb_img, define_fn, None, headless,
+                                                                       rotation_deg, auto, min_confidence)
+            save_coordinate_frame(default_path, origin, x_dir, y_dir, rotation_deg)
+            return origin, x_dir, y_dir, rotation_deg
+
+    if frame_path is not None and os.path.exists(frame_path):
+        origin, x_dir, y_dir, rotation_deg = load_coordinate_frame(frame_path)
+        print(f"已载入坐标系 {frame_path}")
+        return origin, x_dir, y_dir, rotation_deg
+
+    if auto:
+        origin, x_dir, y_dir, confidence = estimate_coordinate_system(rgb_img)
+        print(f"自动检测坐标系置信度: {confidence:.2f}")
+        if confidence >= min_confidence:
+            if frame_path is not None:
+                save_coordinate_frame(frame_path, origin, x_dir, y_dir, 0.0)
+            return origin, x_dir, y_dir, 0.0
+
+    if headless:
+        raise FileNotFoundError(f"无界面模式下找不到坐标系文件且无法自动检测: {frame_path}")
+
+    origin, x_dir, y_dir = define_fn(rgb_img)
+    if frame_path is not None:
+        save_coordinate_frame(frame_path, origin, x_dir, y_dir, rotation_deg)
+    return origin, x_dir, y_dir, rotation_deg
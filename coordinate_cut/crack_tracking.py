@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+
+from endpoint_selection import project_points
+from roi_crop import crop_to_content, extract_skeleton_roi
+from skeleton_line_extraction import extract_longest_path, skeleton_to_graph
+
+
+class CrackTracker:
+    """
+    逐帧跟踪裂纹：第 t 帧与第 t-1 帧做 ORB 特征匹配并估计单应矩阵，
+    将坐标系 (origin, x_dir, y_dir) 和上一帧的主骨架线映射到当前帧，
+    只在上一帧主骨架线膨胀后的 ROI 内骨架化与建图，同时记录裂纹尖端轨迹
+    mask 需与视频帧同尺寸
+    """
+
+    def __init__(self, origin, x_dir, y_dir, max_side=640, n_features=2000, min_matches=15, roi_margin=40):
+        self.origin = np.asarray(origin, dtype=np.float64)
+        self.x_dir = np.asarray(x_dir, dtype=np.float64)
+        self.y_dir = np.asarray(y_dir, dtype=np.float64)
+        self.max_side = max_side
+        self.min_matches = min_matches
+        self.roi_margin = roi_margin
+
+        self.orb = cv2.ORB_create(n_features)
+        self.matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+
+        # 上一帧的特征点（原图坐标）与描述子缓存，每帧只需对当前帧提取一次特征
+        self.prev_pts = None
+        self.prev_des = None
+        self.path = None
+        self.trajectory = []
+
+    def detect_features(self, frame):
+        """
+        在降采样灰度图上提取 ORB 特征，特征点坐标换算回原图
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        scale = min(1.0, self.max_side / max(gray.shape))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        keypoints, descriptors = self.orb.detectAndCompute(gray, None)
+        pts = np.array([kp.pt for kp in keypoints], dtype=np.float32).reshape(-1, 2) / scale
+        return pts, descriptors
+
+    def register(self, frame):
+        """
+        估计上一帧到当前帧的单应矩阵（原图坐标），特征不足或估计失败时返回 None
+        """
+        pts, des = self.detect_features(frame)
+        prev_pts, prev_des = self.prev_pts, self.prev_des
+        self.prev_pts, self.prev_des = pts, des
+        if prev_des is None or des is None:
+            return None
+
+        matches = self.matcher.match(prev_des, des)
+        if len(matches) < self.min_matches:
+            return None
+        src = prev_pts[[m.queryIdx for m in matches]]
+        dst = pts[[m.trainIdx for m in matches]]
+        H, inliers = cv2.findHomography(src, dst, cv2.RANSAC, 3.0)
+        if H is None or inliers.sum() < self.min_matches:
+            return None
+        return H
+
+    def warp_coordinate_system(self, H):
+        """
+        用单应矩阵把坐标系原点和坐标轴方向映射到当前帧，y 轴保持与原来相同的手性
+        """
+        pts = np.array([self.origin, self.origin + self.x_dir * 100, self.origin + self.y_dir * 100])
+        warped = cv2.perspectiveTransform(pts.reshape(-1, 1, 2), H).reshape(-1, 2)
+        origin = warped[0]
+        x_dir = (warped[1] - origin) / np.linalg.norm(warped[1] - origin)
+        y_dir = np.array([-x_dir[1], x_dir[0]])
+        if np.dot(y_dir, warped[2] - origin) < 0:
+            y_dir = -y_dir
+        self.origin, self.x_dir, self.y_dir = origin, x_dir, y_dir
+
+    def roi_from_path(self, path, shape):
+        """
+        上一帧主骨架线（已映射到当前帧）膨胀 roi_margin 像素得到的 ROI
+        返回外接框 (x0, y0, x1, y1) 以及框内的 ROI 掩膜；
+        路径映射到画面之外（相机移开或单应矩阵错误）时返回 None
+        """
+        if not np.isfinite(path).all():
+            return None
+        h, w = shape
+        m = self.roi_margin
+        x0, y0 = np.maximum(np.floor(path.min(axis=0)).astype(int) - m, 0)
+        x1, y1 = np.minimum(np.ceil(path.max(axis=0)).astype(int) + m + 1, (w, h))
+        if x1 <= x0 or y1 <= y0:
+            return None
+        roi_mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        local = np.round(path - (x0, y0)).astype(np.int32).reshape(-1, 1, 2)
+        cv2.polylines(roi_mask, [local], False, 255, 2 * m + 1)
+        return (x0, y0, x1, y1), roi_mask
+
+    def extract_path(self, binary_img, box=None, roi_mask=None):
+        """
+        骨架化并提取主骨架线；给定 ROI 时只处理 ROI 内的前景
+        """
+        if box is not None:
+            x0, y0, x1, y1 = box
+            crop = cv2.bitwise_and(binary_img[y0:y1, x0:x1], roi_mask)
+            offset = (x0, y0)
+        else:
+            crop, offset = binary_img, (0, 0)
+        skeleton, _ = extract_skeleton_roi(crop)
+        roi, (dx, dy) = crop_to_content(skeleton)
+        path = extract_longest_path(skeleton_to_graph(roi, (offset[0] + dx, offset[1] + dy)), method='double_bfs')
+        return np.array(path, dtype=np.float64).reshape(-1, 2)
+
+    def update(self, frame_idx, frame, mask):
+        """
+        处理一帧，返回该帧的主骨架线 (N, 2)（原图坐标）与裂纹尖端在用户坐标系下的坐标 (x', y')
+        尖端取主骨架线两端中 x' 较大的一端；未检测到裂纹时尖端为 None
+        """
+        H = self.register(frame)
+        registered = H is not None
+        if registered:
+            self.warp_coordinate_system(H)
+
+        _, binary_img = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+        path = np.empty((0, 2))
+        if registered and self.path is not None and len(self.path) > 0:
+            prev_path = cv2.perspectiveTransform(self.path.reshape(-1, 1, 2), H).reshape(-1, 2)
+            roi = self.roi_from_path(prev_path, binary_img.shape)
+            if roi is not None:
+                path = self.extract_path(binary_img, *roi)
+        if len(path) == 0:
+            # 首帧、配准失败、上一帧路径移出画面或 ROI 内丢失裂纹时，回退到整幅图像
+            path = self.extract_path(binary_img)
+        self.path = path
+
+        tip = None
+        if len(path) > 0:
+            ends = project_points(path[[0, -1]], self.origin, self.x_dir, self.y_dir)
+            tip = ends[np.argmax(ends[:, 0])]
+        self.trajectory.append((frame_idx, registered, tip))
+        return path, tip
@@ -1,27 +1,18 @@
-import pandas as pd
-import numpy as np
+from polyline_geometry import analyze_polylines
+from table_io import load_points
+from line_fitting import reference_line_or_default
 
-# 直线参数
-k = 0.04255
-b = 0.18810
-A, B, C = k, -1, b
+# 直线参数：给定参考线点表（焊趾线或试件边缘上的点）时用 RANSAC 自动拟合，否则使用原先的 k = 0.04255, b = 0.18810
+reference_points_path = None
+k, b = reference_line_or_default(None if reference_points_path is None else load_points(reference_points_path))
 
-# 1. 读取Excel文件 (假设前两列是 x, y 坐标)
-df = pd.read_excel(r"C:\Users\GHB\Desktop\crack_right.xlsx")
-x = df.iloc[:, 0].to_numpy()
-y = df.iloc[:, 1].to_numpy()
+# 1. 读取坐标表 (假设前两列是 x, y 坐标)；支持 CSV/npy/npz/Parquet，Excel 首次解析后使用二进制缓存
+points = load_points(r"C:\Users\GHB\Desktop\crack_right.xlsx")
 
-# 2. 计算点到直线的距离
-distances = np.abs(A * x + B * y + C) / np.sqrt(A**2 + B**2)
-
-# 3. 计算折线方向向量
-polyline_vec = np.array([x[-1] - x[0], y[-1] - y[0]])
-line_vec = np.array([1, k])
-
-# 4. 计算夹角
-dot_product = np.dot(polyline_vec, line_vec)
-angle_rad = np.arccos(dot_product / (np.linalg.norm(polyline_vec) * np.linalg.norm(line_vec)))
-angle_deg = np.degrees(angle_rad)
+# 2-4. 计算点到直线的距离，以及折线首尾连线与直线的夹角
+result = analyze_polylines([points], k, b)
+distances = result['distances']
+angle_deg = result['chord_angles'][0]
 
 # 5. 保存结果
 with open("point_line_distances_right.txt", "w", encoding="utf-8") as f:
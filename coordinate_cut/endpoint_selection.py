@@ -0,0 +1,104 @@
+import numpy as np
+from roi_crop import crop_to_content, extract_skeleton_roi, refine_points_subpixel, scale_points
+from skeleton_line_extraction import extract_longest_path, skeleton_to_graph
+
+
+def project_points(points, origin, x_dir, y_dir):
+    """
+    将 (N, 2) 图像坐标一次性投影到 (origin, x_dir, y_dir) 定义的坐标系下
+    """
+    axes = np.column_stack((x_dir, y_dir))
+    return (np.asarray(points, dtype=np.float64).reshape(-1, 2) - origin) @ axes
+
+
+def select_endpoints(points, origin, x_dir, y_dir, interval=200):
+    """
+    使用点击定义的坐标系，计算每个骨架点在该坐标系下的 (x', y')，并每 interval 选取一个端点
+    确保末端点也被记录
+    points: (N, 2) 数组或 [(x, y), ...] 列表
+    返回:   (M, 2) 数组
+    """
+    transformed = project_points(points, origin, x_dir, y_dir)
+    if len(transformed) == 0:
+        return transformed
+
+    # 按 x' 稳定排序（与原先 list.sort 的相同 x' 保持原顺序一致）
+    transformed = transformed[np.argsort(transformed[:, 0], kind='stable')]
+    xs = transformed[:, 0]
+
+    # 每次用 searchsorted 跳到第一个满足 x' - last >= interval 的点，循环次数只等于选中点数
+    picked = []
+    i = 0
+    while i < len(xs):
+        picked.append(i)
+        j = max(int(np.searchsorted(xs, xs[i] + interval, side='left')), i + 1)
+        # 修正浮点舍入：判据与逐点比较的 x' - last >= interval 完全相同
+        while j > i + 1 and xs[j - 1] - xs[i] >= interval:
+            j -= 1
+        while j < len(xs) and xs[j] - xs[i] < interval:
+            j += 1
+        i = j
+
+    selected = transformed[picked]
+    # 确保末端也记录
+    if not np.array_equal(selected[-1], transformed[-1]):
+        selected = np.vstack((selected, transformed[-1]))
+
+    return selected
+
+
+def sample_path_by_arc_length(path, origin, x_dir, y_dir, interval=200, mm_per_px=None):
+    """
+    沿有序像素路径（如 extract_longest_path 的输出）按弧长每 interval 采样一个点，确保末端点也被记录
+    interval:  采样间距，单位为像素；给定 mm_per_px 时单位为毫米
+    返回:      (M, 2) 采样点在用户坐标系下的坐标 (x', y')，路径方向统一为 x' 递增
+    """
+    path = np.asarray(path, dtype=np.float64).reshape(-1, 2)
+    if len(path) < 2:
+        return project_points(path, origin, x_dir, y_dir)
+
+    projected_ends = project_points(path[[0, -1]], origin, x_dir, y_dir)
+    if projected_ends[1, 0] < projected_ends[0, 0]:
+        path = path[::-1]
+
+    step = interval / mm_per_px if mm_per_px else interval
+    seg = np.hypot(*np.diff(path, axis=0).T)
+    cum = np.concatenate(([0.0], np.cumsum(seg)))
+    targets = np.arange(0.0, cum[-1], step)
+    targets = np.append(targets, cum[-1])
+
+    # 每个采样弧长落在哪一段，并在该段内线性插值
+    idx = np.clip(np.searchsorted(cum, targets, side='right') - 1, 0, len(seg) - 1)
+    frac = (targets - cum[idx]) / seg[idx]
+    samples = path[idx] + frac[:, None] * (path[idx + 1] - path[idx])
+    return project_points(samples, origin, x_dir, y_dir)
+
+
+def select_endpoints_along_path(skeleton_img, origin, x_dir, y_dir, interval=200, mm_per_px=None):
+    """
+    提取骨架的主骨架线（最长路径），再按弧长采样，代替按投影 x' 采样
+    """
+    roi, offset = crop_to_content(skeleton_img)
+    path = extract_longest_path(skeleton_to_graph(roi, offset), method='double_bfs')
+    return sample_path_by_arc_length(path, origin, x_dir, y_dir, interval, mm_per_px)
+
+
+def select_endpoints_native(binary_img, image_shape, origin, x_dir, y_dir, interval=200, sampling='projection',
+                            subpixel=False):
+    """
+    在 mask 原始分辨率下骨架化并选取端点，骨架点坐标再解析地换算到 RGB 图像 (image_shape) 坐标，
+    代替先把 mask 放大到 RGB 尺寸再骨架化
+    subpixel: 换算前用距离变换对骨架点做亚像素细化
+    返回:     (原始分辨率骨架图, (M, 2) 端点在用户坐标系下的坐标)
+    """
+    skeleton, points = extract_skeleton_roi(binary_img)
+    if sampling == 'arc_length':
+        roi, offset = crop_to_content(skeleton)
+        points = np.array(extract_longest_path(skeleton_to_graph(roi, offset), method='double_bfs')).reshape(-1, 2)
+    if subpixel and len(points):
+        points = refine_points_subpixel(binary_img, points)
+    points = scale_points(points, binary_img.shape, image_shape)
+
+    if sampling == 'arc_length':
+        return skeleton, sample_path_by_arc_length(points, origin, x_dir, y_dir, interval)
+    return skeleton, select_endpoints(points, origin, x_dir, y_dir, interval)
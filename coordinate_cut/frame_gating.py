@@ -0,0 +1,76 @@
+import csv
+
+import cv2
+import numpy as np
+
+
+def downscale_gray(frame, size=256):
+    """
+    转灰度并缩小到长边 size 像素，后续的模糊度与相似度判断都在小图上进行
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    scale = size / max(gray.shape)
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def laplacian_variance(gray):
+    """
+    拉普拉斯方差，值越小图像越模糊
+    """
+    return cv2.Laplacian(gray, cv2.CV_64F).var()
+
+
+def dhash(gray, hash_size=8):
+    """
+    差分感知哈希：缩放到 (hash_size+1) x hash_size，比较水平相邻像素，得到 hash_size^2 位整数
+    """
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def gate_frames(frames, blur_threshold=100.0, hash_threshold=6, size=256, skip_log=None):
+    """
+    帧筛选：跳过运动模糊帧和与上一关键帧几乎相同的帧，只输出信息量大的关键帧
+    frames:         产生 (帧号, 时间戳毫秒, 帧) 的可迭代对象，如 iter_video_frames
+    blur_threshold: 小图拉普拉斯方差低于该值视为模糊
+    hash_threshold: 与上一关键帧 dHash 的汉明距离不超过该值视为重复
+    skip_log:       给定列表时，追加 (帧号, 原因, 指标值) 记录被跳过的帧
+    """
+    last_hash = None
+    n_kept = n_blur = n_duplicate = 0
+
+    for frame_idx, timestamp_ms, frame in frames:
+        gray = downscale_gray(frame, size)
+
+        sharpness = laplacian_variance(gray)
+        if sharpness < blur_threshold:
+            n_blur += 1
+            if skip_log is not None:
+                skip_log.append((frame_idx, 'blur', sharpness))
+            continue
+
+        frame_hash = dhash(gray)
+        if last_hash is not None:
+            distance = bin(frame_hash ^ last_hash).count('1')
+            if distance <= hash_threshold:
+                n_duplicate += 1
+                if skip_log is not None:
+                    skip_log.append((frame_idx, 'duplicate', distance))
+                continue
+
+        last_hash = frame_hash
+        n_kept += 1
+        yield frame_idx, timestamp_ms, frame
+
+    print(f"帧筛选完成：保留 {n_kept} 帧，模糊跳过 {n_blur} 帧，重复跳过 {n_duplicate} 帧")
+
+
+def save_skip_log(skip_log, save_csv_path):
+    with open(save_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'reason', 'value'])
+        writer.writerows(skip_log)
+    print(f"跳过帧记录已保存至 {save_csv_path}")
@@ -0,0 +1,168 @@
+import csv
+import os
+
+import cv2
+import numpy as np
+
+from video_fps import iter_video_frames
+
+INDEX_NAME = "index.csv"
+
+
+def store_array_path(store_dir, name):
+    return os.path.join(store_dir, f"{name}.npy")
+
+
+def save_index(store_dir, frame_ids, timestamps):
+    """
+    槽位索引：第 slot 个槽位对应的帧号与时间戳，所有数组共用同一索引
+    """
+    with open(os.path.join(store_dir, INDEX_NAME), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['slot', 'frame', 'timestamp_ms'])
+        writer.writerows((slot, frame_idx, f"{ts:.3f}") for slot, (frame_idx, ts) in enumerate(zip(frame_ids, timestamps)))
+
+
+def load_index(store_dir):
+    """
+    返回 (帧号数组, 时间戳数组)，下标即槽位
+    """
+    with open(os.path.join(store_dir, INDEX_NAME), 'r', newline='') as f:
+        rows = list(csv.reader(f))[1:]
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    table = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    return table[:, 1].astype(np.int64), table[:, 2]
+
+
+def frame_capacity(video_path, start=0, stop=None, step=1):
+    """
+    由视频属性预估需要的槽位数，用于预分配 .npy 文件
+    CAP_PROP_FRAME_COUNT 只是近似值，部分容器/视频流为 0 或负数，此时返回 0，写入时再按需扩容
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频文件: {video_path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        return 0
+    stop = total if stop is None else min(stop, total)
+    return len(range(start, stop, step))
+
+
+def grow_store_array(path, capacity):
+    """
+    槽位写满时把 .npy 帧栈扩容到 capacity：新建更大的文件，拷贝已有槽位后替换原文件
+    调用前须 flush 并释放对 path 的全部内存映射；这里只读打开原文件拷贝，替换前关闭，
+    否则 Windows 上无法替换仍被映射的文件
+    按倍数扩容时总拷贝量不超过最终大小的两倍
+    """
+    tmp_path = path + '.tmp'
+    old = np.load(path, mmap_mode='r')
+    grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=old.dtype, shape=(capacity,) + old.shape[1:])
+    grown[:len(old)] = old
+    grown.flush()
+    del grown, old
+    os.replace(tmp_path, path)
+    return np.lib.format.open_memmap(path, mode='r+')
+
+
+def video_to_frame_store(video_path, store_dir, start=0, stop=None, step=1, progress_every=500,
+                         min_capacity=256):
+    """
+    将视频帧写入一个可内存映射的 .npy 帧栈 (N, H, W, 3)，并保存帧号与时间戳索引，
+    代替成千上万个 frame_%05d.jpg 小文件
+    按视频帧数属性预分配，实际帧数更多（或帧数属性无效）时按倍数扩容；
+    帧数属性偏大时，多余的槽位保留在文件末尾，读取时按索引长度截取
+
+    :return: 实际写入的帧数
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    path = store_array_path(store_dir, 'frames')
+    capacity = frame_capacity(video_path, start, stop, step)
+    frames = None
+    frame_ids, timestamps = [], []
+    for slot, (frame_idx, timestamp_ms, frame) in enumerate(iter_video_frames(video_path, start, stop, step)):
+        if frames is None:
+            # 帧尺寸以实际解码的第一帧为准
+            capacity = capacity or min_capacity
+            frames = np.lib.format.open_memmap(path, mode='w+', dtype=frame.dtype, shape=(capacity,) + frame.shape)
+        elif slot >= len(frames):
+            capacity = max(2 * len(frames), min_capacity)
+            frames.flush()
+            del frames
+            frames = grow_store_array(path, capacity)
+        frames[slot] = frame
+        frame_ids.append(frame_idx)
+        timestamps.append(timestamp_ms)
+        if progress_every and (slot + 1) % progress_every == 0:
+            print(f"已写入 {slot + 1} 帧")
+    if frames is None:
+        frames = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(0, 0, 0, 3))
+    frames.flush()
+    del frames
+
+    save_index(store_dir, frame_ids, timestamps)
+    print(f"视频分帧完成，共写入 {len(frame_ids)} 帧到 {store_dir}")
+    return len(frame_ids)
+
+
+def open_store_array(store_dir, name='frames', mode='r'):
+    """
+    以内存映射方式打开帧栈中的数组（frames / masks / skeletons ...），按索引长度截取，切片不拷贝
+    """
+    n = len(load_index(store_dir)[0])
+    return np.load(store_array_path(store_dir, name), mmap_mode=mode)[:n]
+
+
+def iter_store_frames(store_dir, name='frames'):
+    """
+    与 video_fps.iter_video_frames 相同的 (帧号, 时间戳毫秒, 帧) 生成器，可直接接入 video_pipeline
+    """
+    frame_ids, timestamps = load_index(store_dir)
+    frames = open_store_array(store_dir, name)
+    for slot, (frame_idx, timestamp_ms) in enumerate(zip(frame_ids.tolist(), timestamps.tolist())):
+        yield frame_idx, timestamp_ms, frames[slot]
+
+
+def write_store_array(store_dir, name, items, dtype=np.uint8):
+    """
+    将后续生成的 mask、骨架等按帧号写入同一帧栈，槽位布局与 frames 一致
+    items: 产生 (帧号, 二维数组) 的可迭代对象，未出现的帧保持全 0
+    """
+    frame_ids, _ = load_index(store_dir)
+    slot_of = {frame_idx: slot for slot, frame_idx in enumerate(frame_ids.tolist())}
+    array = None
+    n_written = 0
+    for frame_idx, img in items:
+        if array is None:
+            array = np.lib.format.open_memmap(store_array_path(store_dir, name), mode='w+',
+                                              dtype=dtype, shape=(len(frame_ids),) + img.shape)
+        array[slot_of[frame_idx]] = img
+        n_written += 1
+    if array is not None:
+        array.flush()
+    print(f"{name}: 共写入 {n_written} 帧到 {store_dir}")
+    return n_written
+
+
+def store_mask_loader(store_dir, name='masks'):
+    """
+    从帧栈读取 mask 的 mask_fn(frame_idx, frame)，可直接传给 video_pipeline
+    """
+    frame_ids, _ = load_index(store_dir)
+    slot_of = {frame_idx: slot for slot, frame_idx in enumerate(frame_ids.tolist())}
+    masks = open_store_array(store_dir, name)
+
+    def load(frame_idx, frame):
+        slot = slot_of.get(frame_idx)
+        return None if slot is None else np.asarray(masks[slot])
+    return load
+
+
+if __name__ == "__main__":
+    video_path = r"C:\Users\GHB\Desktop\video1.mp4"
+    store_dir = r"C:\Users\GHB\Desktop\video1_store"
+
+    video_to_frame_store(video_path, store_dir)
@@ -0,0 +1,146 @@
+import os
+
+import cv2
+import numpy as np
+
+from endpoint_selection import project_points
+from polyline_geometry import analyze_polylines, pack_polylines, point_line_distances, save_polyline_table
+from table_io import load_points
+
+# distance.py / distance_and_angle.py 原先手工标定的参考线，拟合失败或未提供参考点时使用
+DEFAULT_K = 0.04255
+DEFAULT_B = 0.18810
+
+
+def fit_lines_lstsq(points, offsets):
+    """
+    对 offsets 划分的多组点一次性做最小二乘直线拟合 y = kx + b（分组求和，无循环）
+    返回 k, b 两个 (P, ) 数组；点数不足或 x 全相同的组为 nan
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    starts = offsets[:-1]
+    n = np.diff(offsets).astype(np.float64)
+    valid = n > 0
+    x, y = points[:, 0], points[:, 1]
+
+    def group_sum(v):
+        sums = np.zeros(len(n))
+        if len(v):
+            sums[valid] = np.add.reduceat(v, starts[valid])
+        return sums
+
+    sx, sy, sxx, sxy = group_sum(x), group_sum(y), group_sum(x * x), group_sum(x * y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = n * sxx - sx * sx
+        k = (n * sxy - sx * sy) / denom
+        b = (sy - k * sx) / n
+    bad = (n < 2) | np.isclose(denom, 0)
+    k[bad], b[bad] = np.nan, np.nan
+    return k, b
+
+
+def fit_line_lstsq(points):
+    k, b = fit_lines_lstsq(points, np.array([0, len(points)]))
+    return k[0], b[0]
+
+
+def fit_line_ransac(points, threshold=1.0, n_iter=200, seed=0):
+    """
+    RANSAC 拟合 y = kx + b：一次随机抽取 n_iter 对点，所有候选直线的内点数用广播计算，
+    取内点最多的候选，再用其内点做最小二乘精修
+    threshold: 内点到直线的最大距离（与坐标同单位）
+    返回 k, b, inliers (N, ) 布尔数组
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    if len(points) < 2:
+        return np.nan, np.nan, np.zeros(len(points), dtype=bool)
+
+    rng = np.random.default_rng(seed)
+    i = rng.integers(0, len(points), n_iter)
+    j = rng.integers(0, len(points), n_iter)
+    p, q = points[i], points[j]
+    dx = q[:, 0] - p[:, 0]
+    ok = dx != 0
+    if not ok.any():
+        return np.nan, np.nan, np.zeros(len(points), dtype=bool)
+    k = (q[ok, 1] - p[ok, 1]) / dx[ok]
+    b = p[ok, 1] - k * p[ok, 0]
+
+    # 候选直线 x 点的距离矩阵按块广播计算，控制边缘像素很多时的内存
+    x, y = points[:, 0], points[:, 1]
+    counts = np.empty(len(k), dtype=np.int64)
+    chunk = max(1, 4000000 // len(points))
+    for s in range(0, len(k), chunk):
+        kc, bc = k[s:s + chunk, None], b[s:s + chunk, None]
+        dist = np.abs(kc * x - y + bc) / np.sqrt(kc ** 2 + 1)
+        counts[s:s + chunk] = (dist <= threshold).sum(axis=1)
+    best = np.argmax(counts)
+    inliers = point_line_distances(points, k[best], b[best]) <= threshold
+
+    k_fit, b_fit = fit_line_lstsq(points[inliers])
+    if np.isnan(k_fit):
+        return k[best], b[best], inliers
+    return k_fit, b_fit, point_line_distances(points, k_fit, b_fit) <= threshold
+
+
+def fit_reference_lines(point_sets, method='ransac', threshold=1.0, n_iter=200):
+    """
+    批量拟合多个试件的参考线（焊趾线或试件边缘）
+    method: 'lstsq' 所有试件一次分组最小二乘；'ransac' 逐试件 RANSAC
+    返回 k, b 两个 (P, ) 数组
+    """
+    if method == 'lstsq':
+        return fit_lines_lstsq(*pack_polylines(point_sets))
+    fits = [fit_line_ransac(points, threshold, n_iter)[:2] for points in point_sets]
+    k, b = np.array(fits, dtype=np.float64).reshape(-1, 2).T
+    return k, b
+
+
+def edge_points(gray, canny_thresholds=(50, 150), roi=None, origin=None, x_dir=None, y_dir=None, mm_per_px=None):
+    """
+    提取图像中的边缘像素作为参考线拟合的输入
+    roi:                 (x0, y0, x1, y1)，只取该范围内的边缘（如焊趾附近）
+    origin/x_dir/y_dir:  给定时将边缘点投影到用户坐标系，与裂纹坐标表一致
+    mm_per_px:           给定时再换算为毫米
+    返回 (N, 2) 数组
+    """
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 0), *canny_thresholds)
+    x0, y0 = 0, 0
+    if roi is not None:
+        x0, y0, x1, y1 = roi
+        edges = edges[y0:y1, x0:x1]
+    ys, xs = np.nonzero(edges)
+    points = np.column_stack((xs + x0, ys + y0)).astype(np.float64)
+    if origin is not None:
+        points = project_points(points, origin, x_dir, y_dir)
+    if mm_per_px is not None:
+        points = points * mm_per_px
+    return points
+
+
+def reference_line_or_default(points=None, method='ransac', threshold=1.0):
+    """
+    有参考点时拟合参考线，否则（或拟合失败）返回原先的常数 DEFAULT_K, DEFAULT_B
+    """
+    if points is None or len(points) < 2:
+        return DEFAULT_K, DEFAULT_B
+    k, b = fit_reference_lines([points], method, threshold)
+    if np.isnan(k[0]):
+        return DEFAULT_K, DEFAULT_B
+    return k[0], b[0]
+
+
+def analyze_specimens(crack_paths, reference_paths, save_csv_path, method='ransac', threshold=1.0):
+    """
+    批量处理多个试件：读取每个试件的裂纹坐标表与参考线点表，拟合参考线后
+    一次计算所有裂纹的点到直线距离与夹角，写成一张表（折线名为裂纹文件名）
+    reference_paths 中为 None 的试件使用默认参考线
+    """
+    cracks = [load_points(path) for path in crack_paths]
+    lines = [reference_line_or_default(None if path is None else load_points(path), method, threshold)
+             for path in reference_paths]
+    k, b = np.array(lines, dtype=np.float64).reshape(-1, 2).T
+    result = analyze_polylines(cracks, k, b)
+    names = [os.path.splitext(os.path.basename(path))[0] for path in crack_paths]
+    save_polyline_table(result, save_csv_path, names)
+    return result, k, b
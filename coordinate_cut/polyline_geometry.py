@@ -0,0 +1,106 @@
+import csv
+
+import numpy as np
+
+
+def pack_polylines(polylines):
+    """
+    将多条折线打包为不规则数组：points (N, 2) 依次拼接所有折线的点，
+    offsets (P + 1,) 为每条折线在 points 中的起止下标，第 i 条为 points[offsets[i]:offsets[i + 1]]
+    """
+    polylines = [np.asarray(p, dtype=np.float64).reshape(-1, 2) for p in polylines]
+    offsets = np.concatenate(([0], np.cumsum([len(p) for p in polylines]))).astype(np.int64)
+    points = np.concatenate(polylines) if polylines else np.empty((0, 2))
+    return points, offsets
+
+
+def per_point(values, offsets):
+    """
+    将每条折线一个的参数（如各自的 k、b）展开到每个点；标量原样返回
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 0:
+        return values
+    return np.repeat(values, np.diff(offsets))
+
+
+def point_line_distances(points, k, b):
+    """
+    点到直线 y = kx + b 的距离，k、b 可为标量或与 points 等长的数组
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    A, B, C = k, -1, b
+    return np.abs(A * points[:, 0] + B * points[:, 1] + C) / np.sqrt(A ** 2 + B ** 2)
+
+
+def vector_line_angles(vectors, k):
+    """
+    向量与直线方向 (1, k) 的夹角（度，0~180），与 arccos(点积 / 模长积) 相同，
+    用 arctan2(|叉积|, 点积) 计算；零向量为 nan
+    """
+    vx, vy = vectors[:, 0], vectors[:, 1]
+    angles = np.degrees(np.arctan2(np.abs(vx * k - vy), vx + vy * k))
+    angles[(vx == 0) & (vy == 0)] = np.nan
+    return angles
+
+
+def segment_angles(points, offsets, k):
+    """
+    所有折线每一段与直线的夹角，一次 np.diff 计算
+    返回 (N, ) 数组：第 i 个值为以点 i 为起点的线段的夹角，每条折线的最后一个点为 nan
+    """
+    seg = np.diff(points, axis=0, append=points[-1:])
+    angles = vector_line_angles(seg, per_point(k, offsets))
+    # 空折线没有最后一个点，offsets[1:] - 1 会指向前一条折线
+    non_empty = np.diff(offsets) > 0
+    angles[offsets[1:][non_empty] - 1] = np.nan
+    return angles
+
+
+def chord_angles(points, offsets, k):
+    """
+    每条折线首尾连线与直线的夹角 (P, )，少于两个点的折线为 nan
+    """
+    valid = np.diff(offsets) >= 2
+    k = np.broadcast_to(np.asarray(k, dtype=np.float64), valid.shape)
+    angles = np.full(len(valid), np.nan)
+    starts, ends = offsets[:-1][valid], offsets[1:][valid] - 1
+    angles[valid] = vector_line_angles(points[ends] - points[starts], k[valid])
+    return angles
+
+
+def analyze_polylines(polylines, k, b):
+    """
+    一次计算多条折线的点到直线距离、每段夹角与首尾连线夹角
+    k、b 可为标量（所有折线共用一条参考线）或长度为折线数的数组
+    返回 dict: points, offsets, distances (N, ), segment_angles (N, ), chord_angles (P, )
+    """
+    points, offsets = pack_polylines(polylines)
+    return {
+        'points': points,
+        'offsets': offsets,
+        'distances': point_line_distances(points, per_point(k, offsets), per_point(b, offsets)),
+        'segment_angles': segment_angles(points, offsets, k),
+        'chord_angles': chord_angles(points, offsets, k),
+    }
+
+
+def save_polyline_table(result, save_csv_path, names=None):
+    """
+    将 analyze_polylines 的结果写成一张表：
+    polyline, point, x, y, distance, segment_angle, chord_angle
+    names 为每条折线的名称，默认为序号
+    """
+    offsets = result['offsets']
+    counts = np.diff(offsets)
+    names = np.arange(len(counts)) if names is None else np.asarray(names)
+    polyline = np.repeat(names, counts)
+    point = np.arange(offsets[-1]) - np.repeat(offsets[:-1], counts)
+    chord = np.repeat(result['chord_angles'], counts)
+
+    with open(save_csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['polyline', 'point', 'x', 'y', 'distance', 'segment_angle', 'chord_angle'])
+        writer.writerows(zip(polyline.tolist(), point.tolist(), *result['points'].T.tolist(),
+                             result['distances'].tolist(), result['segment_angles'].tolist(), chord.tolist()))
+    print(f"{len(counts)} 条折线的距离与夹角已保存到 {save_csv_path}")
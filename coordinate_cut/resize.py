@@ -1,16 +1,32 @@
 import cv2
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+def image_size(path):
+    """
+    只读取文件头获取图像尺寸 (height, width)，不解码像素
+    与 cv2.imread 一致：EXIF 方向为旋转 90° 的 JPEG 交换宽高
+    """
+    with Image.open(path) as img:
+        width, height = img.size
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+    return height, width
 
 def resize_mask_to_rgb(mask_path, rgb_path, save_path):
     """
     将 mask 图 resize 到 RGB 图尺寸，并保存
     """
-    # 读取 RGB 图像，获取尺寸
-    rgb_img = cv2.imread(rgb_path)
-    if rgb_img is None:
+    # 读取 RGB 图像文件头，获取尺寸
+    try:
+        height, width = image_size(rgb_path)
+    except OSError:
         print("RGB 图像读取失败")
         return
-    height, width = rgb_img.shape[:2]
 
     # 读取 mask 图像
     mask_img = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
@@ -25,6 +41,64 @@ def resize_mask_to_rgb(mask_path, rgb_path, save_path):
     cv2.imwrite(save_path, resized_mask)
     print(f"Mask 已保存到 {save_path}")
 
+def list_images(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTS))
+
+def pair_masks_to_rgb(mask_dir, rgb_dir, suffix='_resized'):
+    """
+    按文件名前缀把 mask 与 RGB 图配对：DSC00200_main_skeleton.jpg -> DSC00200.JPG
+    同一 mask 匹配多个 RGB 文件名时取最长的前缀；已是 resize 输出（以 suffix 结尾）的文件不参与配对
+    返回 [(mask_path, rgb_path), ...]
+    """
+    rgb_by_stem = {os.path.splitext(f)[0]: os.path.join(rgb_dir, f) for f in list_images(rgb_dir)}
+    stems = sorted(rgb_by_stem, key=len, reverse=True)
+
+    pairs = []
+    for f in list_images(mask_dir):
+        mask_stem = os.path.splitext(f)[0]
+        if suffix and mask_stem.endswith(suffix):
+            continue
+        for stem in stems:
+            if mask_stem == stem or mask_stem.startswith(stem + '_'):
+                pairs.append((os.path.join(mask_dir, f), rgb_by_stem[stem]))
+                break
+        else:
+            print(f"未找到与 {f} 对应的 RGB 图像")
+    return pairs
+
+def resize_masks_in_dir(mask_dir, rgb_dir, save_dir=None, suffix='_resized', workers=4):
+    """
+    批量将目录下的 mask（例如 test_dataset/<model>/）resize 到对应 RGB 图尺寸
+    尺寸只读文件头，resize 与写盘在线程池中完成（cv2 会释放 GIL）；尺寸已一致的 mask 与已生成的输出跳过
+
+    :param save_dir: 输出目录，默认与 mask 同目录，文件名加 suffix
+    :return: 实际 resize 的 mask 数量
+    """
+    save_dir = save_dir or mask_dir
+    os.makedirs(save_dir, exist_ok=True)
+
+    def process(pair):
+        mask_path, rgb_path = pair
+        stem, ext = os.path.splitext(os.path.basename(mask_path))
+        out_path = os.path.join(save_dir, stem + suffix + ext)
+        target = image_size(rgb_path)
+        # mask 本身或已有的输出尺寸已一致时跳过
+        if image_size(mask_path) == target or (os.path.exists(out_path) and image_size(out_path) == target):
+            return False
+        mask_img = cv2.imread(mask_path, cv2.IMREAD_GRAYSCALE)
+        if mask_img is None:
+            print(f"Mask 图像读取失败: {mask_path}")
+            return False
+        resized_mask = cv2.resize(mask_img, (target[1], target[0]), interpolation=cv2.INTER_NEAREST)
+        cv2.imwrite(out_path, resized_mask)
+        return True
+
+    pairs = pair_masks_to_rgb(mask_dir, rgb_dir, suffix)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        n_resized = sum(pool.map(process, pairs))
+    print(f"共 {len(pairs)} 对，resize {n_resized} 个 mask，跳过 {len(pairs) - n_resized} 个")
+    return n_resized
+
 if __name__ == '__main__':
     # 示例路径
     rgb_path = r"C:\Users\GHB\Desktop\test_dataset\DSC00200.JPG"
@@ -32,3 +106,6 @@ if __name__ == '__main__':
     save_path = r"C:\Users\GHB\Desktop\test_dataset\Attunet\DSC00200_main_skeleton_resized.jpg"
 
     resize_mask_to_rgb(mask_path, rgb_path, save_path)
+
+    # 批量：整个模型输出目录
+    # resize_masks_in_dir(r"C:\Users\GHB\Desktop\test_dataset\Attunet", r"C:\Users\GHB\Desktop\test_dataset")
@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+from skimage.morphology import skeletonize
+
+
+def find_foreground_rois(binary_img, pad=1):
+    """
+    查找二值图中每个前景连通分量（8 连通）的外接框，并向外扩展 pad 像素
+    返回:
+        labels: 连通分量标签图
+        rois:   [(label, x0, y0, x1, y1), ...]，切片区间为 [y0:y1, x0:x1]
+    """
+    h, w = binary_img.shape
+    n, labels, stats, _ = cv2.connectedComponentsWithStats((binary_img // 255).astype(np.uint8), connectivity=8)
+    rois = []
+    for label in range(1, n):
+        x, y, bw, bh = stats[label, :4]
+        rois.append((label, max(0, x - pad), max(0, y - pad), min(w, x + bw + pad), min(h, y + bh + pad)))
+    return labels, rois
+
+
+def crop_to_content(img, pad=1):
+    """
+    裁剪到所有非零像素的外接框（扩展 pad 像素），返回裁剪图及其左上角在原图中的偏移 (x0, y0)
+    """
+    ys, xs = np.nonzero(img.any(axis=1))[0], np.nonzero(img.any(axis=0))[0]
+    if len(ys) == 0:
+        return img[:0, :0], (0, 0)
+    h, w = img.shape[:2]
+    y0, y1 = max(0, ys[0] - pad), min(h, ys[-1] + 1 + pad)
+    x0, x1 = max(0, xs[0] - pad), min(w, xs[-1] + 1 + pad)
+    return img[y0:y1, x0:x1], (int(x0), int(y0))
+
+
+def extract_skeleton_roi(binary_img, pad=1):
+    """
+    只在每个前景连通分量的外接框内骨架化，结果与 extract_skeleton 对整图骨架化一致
+    （骨架化只依赖 3x3 邻域，互不 8 连通的分量互不影响）
+    返回:
+        skeleton: 与原图同尺寸的骨架图 (0/255)
+        points:   (N, 2) 骨架点在原图中的坐标 (x, y)，按行优先排序，与 np.where 顺序相同
+    """
+    skeleton = np.zeros(binary_img.shape, dtype=np.uint8)
+    labels, rois = find_foreground_rois(binary_img, pad)
+
+    xs_list, ys_list = [], []
+    for label, x0, y0, x1, y1 in rois:
+        # 只保留本分量的像素，避免外接框内其他分量被截断后参与骨架化
+        crop_skeleton = skeletonize(labels[y0:y1, x0:x1] == label)
+        ys, xs = np.nonzero(crop_skeleton)
+        skeleton[ys + y0, xs + x0] = 255
+        xs_list.append(xs + x0)
+        ys_list.append(ys + y0)
+
+    if not rois:
+        return skeleton, np.empty((0, 2), dtype=np.int64)
+
+    xs, ys = np.concatenate(xs_list), np.concatenate(ys_list)
+    order = np.lexsort((xs, ys))
+    points = np.column_stack((xs[order], ys[order]))
+    return skeleton, points
+
+
+def scale_points(points, src_shape, dst_shape):
+    """
+    将 src_shape 图像上的点坐标 (x, y) 解析地换算到 dst_shape 图像上（按像素中心对齐），
+    与把 src 图像用 INTER_NEAREST resize 到 dst 尺寸后的位置一致，但无需放大图像
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    scale = np.array([dst_shape[1] / src_shape[1], dst_shape[0] / src_shape[0]])
+    return (points + 0.5) * scale - 0.5
+
+
+def refine_points_subpixel(binary_img, points):
+    """
+    亚像素细化：以距离变换值为权重，取每个骨架点 3x3 邻域内前景像素的加权质心，
+    使骨架点落到裂纹中线上，返回 (N, 2) 浮点坐标
+    """
+    points = np.asarray(points).reshape(-1, 2)
+    dist = np.pad(cv2.distanceTransform((binary_img > 0).astype(np.uint8), cv2.DIST_L2, 5), 1)
+    xs, ys = points[:, 0].astype(np.int64) + 1, points[:, 1].astype(np.int64) + 1
+
+    dx, dy = np.meshgrid(np.arange(-1, 2), np.arange(-1, 2))
+    dx, dy = dx.ravel(), dy.ravel()
+    weights = dist[ys[:, None] + dy, xs[:, None] + dx]
+    total = weights.sum(axis=1)
+    total[total == 0] = 1.0
+    shift = np.column_stack((weights @ dx, weights @ dy)) / total[:, None]
+    return points + shift
@@ -1,82 +1,273 @@
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from skimage.morphology import skeletonize
 import matplotlib.pyplot as plt
 import networkx as nx
+from roi_crop import crop_to_content, extract_skeleton_roi
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components, dijkstra
+from scipy.spatial import cKDTree
 
 def extract_skeleton(binary_img):
     skeleton = skeletonize(binary_img // 255)
     skeleton = (skeleton * 255).astype(np.uint8)
     return skeleton
 
+def extract_skeleton_tiled(binary_img, tile_size=2048, guard=64, workers=1, out=None, out_path=None):
+    """
+    分块骨架化，峰值内存只与分块大小有关，适用于超大拼接全景图
+    每块向外扩展 guard 像素的保护带一起骨架化，只写回块的中心区域，
+    保护带宽度应大于裂纹的最大半宽，这样拼接处与整图骨架化结果一致
+    binary_img 可以是 np.load(..., mmap_mode='r') 得到的内存映射数组
+    out:      预分配的 uint8 输出数组（可为 np.memmap）
+    out_path: 未给定 out 时，在该路径创建 .npy 内存映射作为输出
+    workers:  大于 1 时用线程池并行处理各块
+    """
+    h, w = binary_img.shape
+    if out is None:
+        if out_path is not None:
+            out = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.uint8, shape=(h, w))
+        else:
+            out = np.zeros((h, w), dtype=np.uint8)
+
+    def process(tile):
+        y0, x0 = tile
+        y1, x1 = min(y0 + tile_size, h), min(x0 + tile_size, w)
+        gy0, gx0 = max(0, y0 - guard), max(0, x0 - guard)
+        gy1, gx1 = min(h, y1 + guard), min(w, x1 + guard)
+        skeleton = skeletonize(binary_img[gy0:gy1, gx0:gx1] // 255)
+        core = skeleton[y0 - gy0:y1 - gy0, x0 - gx0:x1 - gx0]
+        out[y0:y1, x0:x1] = core.astype(np.uint8) * 255
+
+    tiles = [(y0, x0) for y0 in range(0, h, tile_size) for x0 in range(0, w, tile_size)]
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(process, tiles))
+    else:
+        for tile in tiles:
+            process(tile)
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
+
 def connect_by_column_search(skeleton_img, max_search_cols=50):
+    """
+    逐列搜索连接断裂：相邻的两个非空列（间隔不超过 max_search_cols 个空列）之间，
+    前一列的每个骨架点连线到后一列中 y 最接近的骨架点
+    """
     connected = skeleton_img.copy()
     rows, cols = skeleton_img.shape
 
-    last_ys = None
-    col = 0
-    while col < cols:
-        ys = np.where(skeleton_img[:, col] > 0)[0]
-
-        if len(ys) > 0:
-            if last_ys is None:
-                last_ys = ys
-                col_prev = col
-            else:
-                for last_y in last_ys:
-                    diffs = np.abs(ys - last_y)
-                    idx_min = np.argmin(diffs)
-                    y_current = ys[idx_min]
-                    cv2.line(connected, (col_prev, last_y), (col, y_current), 255, 1)
-                last_ys = ys
-                col_prev = col
-            col += 1
+    # 列索引：转置后 nonzero 即按 (列, 行) 排序，一次得到所有列的骨架点
+    xs, ys = np.nonzero(skeleton_img.T)
+    if len(xs) == 0:
+        return connected
+    keys = xs * rows + ys
+    col_counts = np.bincount(xs, minlength=cols)
+    col_start = np.concatenate(([0], np.cumsum(col_counts)))
 
-        else:
-            found = False
-            for offset in range(1, max_search_cols+1):
-                next_col = col + offset
-                if next_col >= cols:
-                    break
-                ys_next = np.where(skeleton_img[:, next_col] > 0)[0]
-                if len(ys_next) > 0:
-                    if last_ys is not None:
-                        for last_y in last_ys:
-                            diffs = np.abs(ys_next - last_y)
-                            idx_min = np.argmin(diffs)
-                            y_next = ys_next[idx_min]
-                            cv2.line(connected, (col_prev, last_y), (next_col, y_next), 255, 1)
-                    last_ys = ys_next
-                    col_prev = next_col
-                    col = next_col
-                    found = True
-                    break
-            if not found:
-                last_ys = None
-                col += 1
+    # 每个非空列连接到下一个非空列，空列间隔超过 max_search_cols 时断开
+    occupied = np.unique(xs)
+    linked = np.diff(occupied) <= max_search_cols + 1
+    next_col = np.full(cols, -1, dtype=np.int64)
+    next_col[occupied[:-1][linked]] = occupied[1:][linked]
+
+    src = next_col[xs] >= 0
+    x0, y0 = xs[src], ys[src]
+    x1 = next_col[x0]
+
+    # 在目标列中二分查找最近的 y，距离相同时取较小的 y（与 np.argmin 一致）
+    start, end = col_start[x1], col_start[x1 + 1] - 1
+    pos = np.searchsorted(keys, x1 * rows + y0)
+    hi = np.clip(pos, start, end)
+    lo = np.clip(pos - 1, start, end)
+    use_lo = np.abs(ys[lo] - y0) <= np.abs(ys[hi] - y0)
+    y1 = np.where(use_lo, ys[lo], ys[hi])
+
+    # 两端点 8 邻接且均已为 255 时连线不改变任何像素，跳过
+    adjacent = (x1 - x0 == 1) & (np.abs(y1 - y0) <= 1)
+    adjacent &= (skeleton_img[y0, x0] == 255) & (skeleton_img[y1, x1] == 255)
+    segments = np.stack((np.column_stack((x0, y0)), np.column_stack((x1, y1))), axis=1)[~adjacent]
+
+    if len(segments) > 0:
+        cv2.polylines(connected, list(segments.astype(np.int32)), False, 255, 1)
+
+    # 经空列跳转到达的列会与自身连线一次，其骨架点被置为 255
+    if max_search_cols >= 1:
+        jumped = (xs >= 1) & (col_counts[xs - 1] == 0)
+        connected[ys[jumped], xs[jumped]] = 255
+
+    return connected
+
+def endpoint_directions(CG, tangent_pixels=10):
+    """
+    压缩图中各端点的坐标、向外的单位切向量及所属连通分量编号
+    切向量取端点与其所在分支上第 tangent_pixels 个像素的连线方向
+    """
+    component_of = {}
+    for label, component in enumerate(nx.connected_components(CG)):
+        for node in component:
+            component_of[node] = label
+
+    points, directions, labels = [], [], []
+    for node in CG.nodes:
+        if CG.degree(node) != 1:
+            continue
+        (_, other, d), = CG.edges(node, data=True)
+        pixels = d['pixels'] if tuple(d['pixels'][0]) == node else d['pixels'][::-1]
+        ref = pixels[min(tangent_pixels, len(pixels) - 1)]
+        vec = np.array(node, dtype=np.float64) - ref
+        points.append(node)
+        directions.append(vec / np.linalg.norm(vec))
+        labels.append(component_of[node])
+
+    return (np.array(points, dtype=np.float64).reshape(-1, 2),
+            np.array(directions, dtype=np.float64).reshape(-1, 2),
+            np.array(labels, dtype=np.int64))
+
+def bridge_endpoints_kdtree(skeleton_img, max_dist=50, max_angle=45, tangent_pixels=10):
+    """
+    用 KD 树连接不同骨架分量的端点，适用于任意方向的裂纹
+    两个端点距离不超过 max_dist，且连线方向与两端点各自的外切向夹角都不超过 max_angle 度时连接；
+    候选对按距离从小到大贪心匹配，每个端点至多连接一次，已连通的分量不再重复连接
+    """
+    connected = skeleton_img.copy()
+    CG = compact_skeleton_graph(skeleton_to_graph(skeleton_img))
+    points, directions, labels = endpoint_directions(CG, tangent_pixels)
+    if len(points) < 2:
+        return connected
+
+    pairs = cKDTree(points).query_pairs(max_dist, output_type='ndarray')
+    pairs = pairs[labels[pairs[:, 0]] != labels[pairs[:, 1]]]
+    if len(pairs) == 0:
+        return connected
+
+    vec = points[pairs[:, 1]] - points[pairs[:, 0]]
+    dist = np.linalg.norm(vec, axis=1)
+    unit = vec / dist[:, None]
+    cos_limit = np.cos(np.deg2rad(max_angle))
+    in_cone = ((np.einsum('ij,ij->i', directions[pairs[:, 0]], unit) >= cos_limit)
+               & (np.einsum('ij,ij->i', directions[pairs[:, 1]], -unit) >= cos_limit))
+    pairs, dist = pairs[in_cone], dist[in_cone]
+
+    used = np.zeros(len(points), dtype=bool)
+    parent = list(range(labels.max() + 1))
+
+    def find(c):
+        while parent[c] != c:
+            parent[c] = parent[parent[c]]
+            c = parent[c]
+        return c
+
+    for i, j in pairs[np.argsort(dist, kind='stable')].tolist():
+        ci, cj = find(labels[i]), find(labels[j])
+        if used[i] or used[j] or ci == cj:
+            continue
+        used[i] = used[j] = True
+        parent[ci] = cj
+        p0 = tuple(int(v) for v in points[i])
+        p1 = tuple(int(v) for v in points[j])
+        cv2.line(connected, p0, p1, 255, 1)
 
     return connected
 
-def skeleton_to_graph(skeleton_img):
+# 8 邻域中只取"向后"的 4 个方向 (dy, dx)，每条边恰好生成一次
+NEIGHBOR_OFFSETS = ((0, 1), (1, -1), (1, 0), (1, 1))
+
+def skeleton_to_edges(skeleton_img, offset=(0, 0)):
+    """
+    用数组运算提取骨架像素及其 8 邻域连接关系
+    offset: skeleton_img 为裁剪图时，其左上角在原图中的坐标 (x0, y0)，输出坐标加上该偏移
+    返回:
+        coords: (N, 2) 骨架像素坐标 (x, y)，按行优先顺序排列
+        edges:  (E, 2) 边的两个端点在 coords 中的下标
+    """
+    mask = skeleton_img > 0
+    h, w = mask.shape
+    flat_idx = np.flatnonzero(mask)
+    coords = np.column_stack((flat_idx % w + offset[0], flat_idx // w + offset[1]))
+
+    pairs = []
+    for dy, dx in NEIGHBOR_OFFSETS:
+        # 平移掩膜求交，得到所有在 (dy, dx) 方向上相邻的像素对
+        x0, x1 = max(0, -dx), w - max(0, dx)
+        src = mask[0:h - dy, x0:x1]
+        dst = mask[dy:h, x0 + dx:x1 + dx]
+        ys, xs = np.nonzero(src & dst)
+        xs = xs + x0
+        pairs.append(np.column_stack((ys * w + xs, (ys + dy) * w + xs + dx)))
+
+    flat_pairs = np.concatenate(pairs)
+    # flat_idx 有序，用 searchsorted 把像素线性下标映射为节点下标
+    edges = np.searchsorted(flat_idx, flat_pairs)
+    return coords, edges
+
+def skeleton_to_graph(skeleton_img, offset=(0, 0)):
+    """
+    节点与邻接关系的插入顺序与逐像素循环建图（行优先遍历像素，邻域按 dx、dy 从 -1 到 1）一致，
+    保证 'pairwise' 等依赖遍历顺序的方法在等长路径间的取舍不变
+    """
+    coords, edges = skeleton_to_edges(skeleton_img, offset)
+    # 每条边拆成两个方向，按 (起点行优先序号, 邻域方向序号) 排序，即逐像素循环中 add_edge 的调用顺序
+    directed = np.concatenate((edges, edges[:, ::-1]))
+    step = coords[directed[:, 1]] - coords[directed[:, 0]]
+    rank = (step[:, 0] + 1) * 3 + step[:, 1] + 1
+    order = np.lexsort((rank, directed[:, 0]))
+    directed, rank = directed[order], rank[order]
+
+    # 节点按首次出现的顺序插入：先是像素自身，随后是它的邻居
+    n = len(coords)
+    events = np.concatenate((np.arange(n), directed[:, 0]))
+    event_rank = np.concatenate((np.full(n, -1), rank))
+    seen = np.concatenate((np.arange(n), directed[:, 1]))[np.lexsort((event_rank, events))]
+    _, first = np.unique(seen, return_index=True)
+
+    nodes = [tuple(p) for p in coords.tolist()]
     G = nx.Graph()
-    h, w = skeleton_img.shape
-    for y in range(h):
-        for x in range(w):
-            if skeleton_img[y, x] > 0:
-                G.add_node((x, y))
-                for dx in [-1, 0, 1]:
-                    for dy in [-1, 0, 1]:
-                        if dx == 0 and dy == 0:
-                            continue
-                        nx_, ny_ = x + dx, y + dy
-                        if 0 <= nx_ < w and 0 <= ny_ < h and skeleton_img[ny_, nx_] > 0:
-                            G.add_edge((x, y), (nx_, ny_))
+    G.add_nodes_from(nodes[i] for i in seen[np.sort(first)].tolist())
+    G.add_edges_from((nodes[i], nodes[j]) for i, j in directed.tolist())
     return G
 
 def find_endpoints(G):
     return [node for node, degree in G.degree() if degree == 1]
 
-def extract_longest_path(G):
+def farthest_endpoint(G, source, endpoints):
+    """
+    从 source 做一次 BFS，返回距离最远的端点及 source 到它的路径
+    """
+    preds = {}
+    target = source
+    # BFS 按层次遍历，最后访问到的端点即为最远端点
+    for node, parent in nx.bfs_predecessors(G, source):
+        preds[node] = parent
+        if node in endpoints:
+            target = node
+    path = [target]
+    while path[-1] != source:
+        path.append(preds[path[-1]])
+    path.reverse()
+    return target, path
+
+def extract_longest_path(G, method='pairwise'):
+    """
+    提取端点之间最长的最短路径作为主骨架线
+    method:
+        'pairwise'   对每对端点求 nx.shortest_path，复杂度随端点数平方增长
+        'double_bfs' 每个连通分量做两次 BFS 求直径，复杂度与骨架大小成线性；
+                     对树状骨架与 'pairwise' 得到相同长度的路径
+        'compact'    先用 compact_skeleton_graph 折叠度为 2 的像素链，再在压缩图上
+                     对所有端点做 dijkstra（交叉点簇内按像素路由），路径长度与 'pairwise' 相同
+    """
+    if method == 'double_bfs':
+        return extract_longest_path_double_bfs(G)
+    if method == 'compact':
+        CG = compact_skeleton_graph(G)
+        return expand_compact_path(CG, extract_longest_path_compact(CG))
+    if method != 'pairwise':
+        raise ValueError(f"未知的 method: {method}")
+
     endpoints = find_endpoints(G)
     longest_path = []
     max_length = 0
@@ -93,33 +284,403 @@ def extract_longest_path(G):
 
     return longest_path
 
-def save_longest_path_as_image(shape, path, save_path):
+def extract_longest_path_double_bfs(G):
+    endpoints = set(find_endpoints(G))
+    longest_path = []
+
+    for component in nx.connected_components(G):
+        comp_endpoints = component & endpoints
+        if len(comp_endpoints) < 2:
+            continue
+        # 第一次 BFS：从任一端点出发找到最远端点 u
+        u, _ = farthest_endpoint(G, next(iter(comp_endpoints)), comp_endpoints)
+        # 第二次 BFS：从 u 出发的最远端点 v，u-v 即该分量的最长路径
+        _, path = farthest_endpoint(G, u, comp_endpoints)
+        if len(path) > len(longest_path):
+            longest_path = path
+
+    return longest_path
+
+# ---------- scipy.sparse.csgraph 后端：节点为整数像素下标，仅在最后转换回坐标 ----------
+
+def skeleton_to_csr(skeleton_img, offset=(0, 0)):
+    """
+    将骨架转为 CSR 邻接矩阵
+    返回:
+        coords: (N, 2) 骨架像素坐标 (x, y)
+        adj:    (N, N) 对称 CSR 邻接矩阵
+    """
+    coords, edges = skeleton_to_edges(skeleton_img, offset)
+    n = len(coords)
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    cols = np.concatenate((edges[:, 1], edges[:, 0]))
+    adj = csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+    return coords, adj
+
+def find_endpoints_csr(adj):
+    degrees = np.diff(adj.indptr)
+    return np.flatnonzero(degrees == 1)
+
+def farthest_endpoints_csr(adj, sources, endpoints, labels, return_predecessors=False):
+    """
+    从每个分量的一个源点同时做 BFS（无权 dijkstra），返回各分量最远端点
+    各分量互不连通，min_only=True 时每个节点的距离即为到本分量源点的距离
+    """
+    result = dijkstra(adj, directed=False, indices=sources, unweighted=True,
+                      min_only=True, return_predecessors=return_predecessors)
+    dist = result[0] if return_predecessors else result
+    ep_labels = labels[endpoints]
+    # 按 (分量, 距离) 排序，每个分量的最后一个端点即为最远端点
+    order = np.lexsort((dist[endpoints], ep_labels))
+    last = np.flatnonzero(np.diff(ep_labels[order], append=-1) != 0)
+    farthest = endpoints[order[last]]
+    if return_predecessors:
+        return farthest, dist, result[1]
+    return farthest, dist
+
+def extract_longest_path_csr(coords, adj):
+    """
+    与 extract_longest_path(G, method='double_bfs') 等价的 csgraph 实现
+    返回主骨架线的像素坐标列表 [(x, y), ...]
+    """
+    endpoints = find_endpoints_csr(adj)
+    _, labels = connected_components(adj, directed=False)
+
+    # 只保留至少有两个端点的分量
+    comp, counts = np.unique(labels[endpoints], return_counts=True)
+    endpoints = endpoints[np.isin(labels[endpoints], comp[counts >= 2])]
+    if len(endpoints) == 0:
+        return []
+
+    # 第一次 BFS：每个分量任取一个端点为源点
+    _, first = np.unique(labels[endpoints], return_index=True)
+    u, _ = farthest_endpoints_csr(adj, endpoints[first], endpoints, labels)
+    # 第二次 BFS：从 u 出发，最远端点 v 与 u 之间即为该分量的最长路径
+    v, dist, preds = farthest_endpoints_csr(adj, u, endpoints, labels, return_predecessors=True)
+
+    node = v[np.argmax(dist[v])]
+    path = [node]
+    while preds[node] >= 0:
+        node = preds[node]
+        path.append(node)
+    path.reverse()
+    return [tuple(p) for p in coords[path].tolist()]
+
+# ---------- 端点/交叉点压缩图：度为 2 的像素链折叠为一条边 ----------
+
+def make_branch(chain, epsilon, head_trim=0, tail_trim=0):
+    pixels = np.array(chain, dtype=np.int32)
+    steps = np.diff(pixels, axis=0)
+    polyline = cv2.approxPolyDP(pixels.reshape(-1, 1, 2), epsilon, False).reshape(-1, 2)
+    return {
+        'pixels': pixels,
+        'hops': len(chain) - 1,
+        'length': float(np.hypot(steps[:, 0], steps[:, 1]).sum()),
+        'polyline': polyline,
+        'head_trim': head_trim,
+        'tail_trim': tail_trim,
+    }
+
+def branch_core(d):
+    """
+    去掉两端补在交叉点簇内的像素，返回分支本身的像素链：首尾为分支离开交叉点簇的像素（或端点）
+    """
+    return d['pixels'][d['head_trim']:len(d['pixels']) - d['tail_trim']]
+
+def oriented_branch(d, start):
+    """
+    返回以节点 start 为起点的 (pixels, head_trim, tail_trim)
+    """
+    if tuple(d['pixels'][0]) == start:
+        return d['pixels'], d['head_trim'], d['tail_trim']
+    return d['pixels'][::-1], d['tail_trim'], d['head_trim']
+
+def cluster_path(members, a, b):
+    """
+    交叉点簇内从像素 a 到像素 b 的最短 8 连通像素链（BFS）
+    """
+    members = set(members)
+    prev = {a: None}
+    queue = [a]
+    for cur in queue:
+        if cur == b:
+            break
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                nxt = (cur[0] + dx, cur[1] + dy)
+                if nxt in members and nxt not in prev:
+                    prev[nxt] = cur
+                    queue.append(nxt)
+    path = [b]
+    while prev[path[-1]] is not None:
+        path.append(prev[path[-1]])
+    return path[::-1]
+
+def walk_chain(G, start, first, is_key, visited):
+    """
+    从 start 沿 first 方向走过度为 2 的像素，直到遇到端点/交叉点（或绕回 start）
+    """
+    chain = [start, first]
+    visited.add(frozenset((start, first)))
+    prev, cur = start, first
+    while not is_key(cur) and cur != start:
+        nxt = next(n for n in G[cur] if n != prev)
+        visited.add(frozenset((cur, nxt)))
+        chain.append(nxt)
+        prev, cur = cur, nxt
+    return chain
+
+def junction_clusters(G, degrees):
+    """
+    将 8 连通相邻的交叉像素（度 >= 3）聚为一个交叉点
+    skeletonize 的 T 形/X 形交叉处通常是几个互相连通的交叉像素，不合并会产生大量 1 像素的交叉点-交叉点分支
+    每个簇以最接近簇质心的像素为代表节点
+    返回:
+        rep_of:     交叉像素 -> 代表像素
+        paths:      代表像素 -> {簇内像素: 簇内从代表像素到该像素的最短像素链}
+        clusters:   代表像素 -> (簇内像素列表, 质心 (x, y))
+    """
+    junctions = [node for node, degree in degrees.items() if degree >= 3]
+    sub = G.subgraph(junctions)
+    rep_of, paths, clusters = {}, {}, {}
+    for members in nx.connected_components(sub):
+        members = sorted(members)
+        pts = np.array(members, dtype=np.float64)
+        centroid = pts.mean(axis=0)
+        rep = members[int(np.argmin(np.hypot(*(pts - centroid).T)))]
+        for node in members:
+            rep_of[node] = rep
+        paths[rep] = nx.single_source_shortest_path(sub.subgraph(members), rep)
+        clusters[rep] = (members, (float(centroid[0]), float(centroid[1])))
+    return rep_of, paths, clusters
+
+def compact_skeleton_graph(G, epsilon=1.0):
+    """
+    将像素骨架图压缩为仅含端点与交叉点的 MultiGraph
+    相互连通的交叉像素先合并为一个交叉点（见 junction_clusters），节点属性 cluster 为簇内像素，
+    centroid 为簇质心；分支的像素链两端补上簇内到代表像素的像素，保证链的首尾即为节点
+    每条边属性:
+        pixels    (K, 2) 像素链坐标 (x, y)，从 u 指向 v
+        hops      像素步数 K-1（与 extract_longest_path 的路径长度度量一致）
+        length    像素链的欧氏长度
+        polyline  approxPolyDP 简化后的折线顶点
+        head_trim pixels 开头补在交叉点簇内的像素步数，tail_trim 为结尾的步数（见 branch_core）
+    纯环（所有像素度为 2）以环上一个像素为节点，用自环边表示
+    """
+    degrees = dict(G.degree())
+    rep_of, paths, clusters = junction_clusters(G, degrees)
+    CG = nx.MultiGraph()
+    for node, degree in degrees.items():
+        if degree < 2:
+            CG.add_node(node, kind='endpoint' if degree == 1 else 'isolated')
+            rep_of[node] = node
+    for rep, (members, centroid) in clusters.items():
+        CG.add_node(rep, kind='junction', cluster=members, centroid=centroid)
+
+    visited = set()
+    for u in list(rep_of):
+        for first in G[u]:
+            # 簇内像素之间的连接已并入交叉点
+            if frozenset((u, first)) in visited or (first in rep_of and rep_of[first] == rep_of[u]):
+                continue
+            chain = walk_chain(G, u, first, rep_of.__contains__, visited)
+            head, tail = rep_of[u], rep_of[chain[-1]]
+            head_trim = tail_trim = 0
+            if head in paths:
+                head_trim = len(paths[head][u]) - 1
+                chain = paths[head][u][:-1] + chain
+            if tail in paths:
+                tail_trim = len(paths[tail][chain[-1]]) - 1
+                chain = chain + paths[tail][chain[-1]][::-1][1:]
+            CG.add_edge(head, tail, **make_branch(chain, epsilon, head_trim, tail_trim))
+
+    # 剩下未访问的度为 2 的像素只可能属于纯环
+    for node, degree in degrees.items():
+        if degree == 2 and not any(frozenset((node, n)) in visited for n in G[node]):
+            CG.add_node(node, kind='loop')
+            chain = walk_chain(G, node, next(iter(G[node])), lambda n: False, visited)
+            CG.add_edge(node, node, **make_branch(chain, epsilon))
+
+    return CG
+
+def merge_chain_node(CG, node, epsilon=1.0):
+    """
+    剪枝后度变为 2 的交叉点不再是分叉，将其两侧的边拼接为一条
+    两侧分支在簇内用最短像素链相连，不经过代表像素来回绕行
+    """
+    (_, a, ka, da), (_, b, kb, db) = CG.edges(node, keys=True, data=True)
+    right, right_head, right_tail = oriented_branch(db, node)
+    left, left_tail, left_head = oriented_branch(da, node)
+    left = left[::-1]
+    left_part = left[:len(left) - left_tail]
+    right_part = right[right_head:]
+    bridge = cluster_path(CG.nodes[node].get('cluster', [node]), tuple(left_part[-1]), tuple(right_part[0]))
+    chain = ([tuple(p) for p in left_part[:-1].tolist()] + bridge
+             + [tuple(p) for p in right_part[1:].tolist()])
+    CG.remove_node(node)
+    CG.add_edge(chain[0], chain[-1], **make_branch(chain, epsilon, left_head, right_tail))
+
+def prune_spurs(CG, min_length, iterations=1, epsilon=1.0):
+    """
+    删除一端为端点、另一端为交叉点且长度小于 min_length 的短分支（毛刺）
+    """
+    for _ in range(iterations):
+        spurs = [(u, v, k) if CG.degree(u) == 1 else (v, u, k)
+                 for u, v, k, d in CG.edges(keys=True, data=True)
+                 if u != v and d['length'] < min_length
+                 and min(CG.degree(u), CG.degree(v)) == 1
+                 and max(CG.degree(u), CG.degree(v)) >= 3]
+        if not spurs:
+            break
+        touched = set()
+        for tip, base, k in spurs:
+            CG.remove_edge(tip, base, k)
+            CG.remove_node(tip)
+            touched.add(base)
+        for node in touched:
+            if CG.has_node(node) and CG.degree(node) == 2 and not CG.has_edge(node, node):
+                merge_chain_node(CG, node, epsilon)
+        for node in touched:
+            if CG.has_node(node) and CG.degree(node) == 1:
+                CG.nodes[node]['kind'] = 'endpoint'
+    return CG
+
+def branch_statistics(CG):
+    """
+    统计压缩图中每条分支的类型与几何量
+    """
+    stats = []
+    for u, v, d in CG.edges(data=True):
+        if u == v:
+            branch_type = 'loop'
+        else:
+            kinds = sorted('endpoint' if CG.degree(n) == 1 else 'junction' for n in (u, v))
+            branch_type = '-'.join(kinds[::-1])
+        euclidean = float(np.hypot(u[0] - v[0], u[1] - v[1]))
+        stats.append({
+            'u': u,
+            'v': v,
+            'type': branch_type,
+            'pixels': d['hops'] + 1,
+            'length': d['length'],
+            'euclidean': euclidean,
+            'tortuosity': d['length'] / euclidean if euclidean > 0 else np.inf,
+        })
+    return stats
+
+def extract_longest_path_compact(CG):
+    """
+    在压缩图上求端点之间最长的最短路径（按像素步数加权）
+    路由图的节点为端点与交叉点簇内的每个像素，分支按 branch_core 的步数加权，簇内相邻像素步数为 1，
+    因此距离与像素图上的最短路径完全一致
+    返回边序列 [(u, v, key, entry, exit, lead), ...]：entry/exit 为分支两端的像素，
+    lead 为从上一条边的 exit（不含）走到本边 entry（含）经过的簇内像素；需要像素时用 expand_compact_path 展开
+    """
+    R = nx.Graph()
+    for u, v, k, d in CG.edges(keys=True, data=True):
+        core = branch_core(d)
+        a, b = tuple(core[0]), tuple(core[-1])
+        if a == b:
+            continue
+        hops = len(core) - 1
+        if not R.has_edge(a, b) or R[a][b]['weight'] > hops:
+            R.add_edge(a, b, weight=hops, edge=(u, v, k))
+    for node, data in CG.nodes(data=True):
+        members = data.get('cluster', [])
+        member_set = set(members)
+        for x, y in members:
+            for nxt in ((x + 1, y - 1), (x + 1, y), (x + 1, y + 1), (x, y + 1)):
+                if nxt in member_set:
+                    R.add_edge((x, y), nxt, weight=1, edge=None)
+
+    endpoints = [n for n in CG.nodes if CG.degree(n) == 1]
+    best, best_hops = None, -1
+    for src in endpoints:
+        dist = nx.single_source_dijkstra_path_length(R, src)
+        for dst in endpoints:
+            if dst != src and dst in dist and dist[dst] > best_hops:
+                best, best_hops = (src, dst), dist[dst]
+    if best is None:
+        return []
+
+    route = nx.dijkstra_path(R, best[0], best[1])
+    edge_path, lead = [], []
+    for a, b in zip(route[:-1], route[1:]):
+        edge = R[a][b]['edge']
+        if edge is None:
+            # 簇内的一步，b 为簇内像素
+            lead.append(b)
+            continue
+        edge_path.append((*edge, a, b, lead))
+        lead = []
+    return edge_path
+
+def expand_compact_path(CG, edge_path):
+    """
+    将 extract_longest_path_compact 的边序列展开为有序像素坐标列表（简单路径，无重复像素）
+    """
+    path = []
+    for u, v, key, entry, exit_, lead in edge_path:
+        core = [tuple(p) for p in branch_core(CG[u][v][key]).tolist()]
+        if core[0] != entry:
+            core = core[::-1]
+        path.extend(lead)
+        path.extend(core[1:] if path else core)
+    return path
+
+def save_longest_path_as_image(shape, path, save_path, compact_graph=None):
     """
     创建与原图同尺寸的空白图，仅绘制主骨架线（白色），背景黑色
+    若给定 compact_graph，path 为 extract_longest_path_compact 返回的边序列，先用 expand_compact_path 展开
     """
     img = np.zeros(shape, dtype=np.uint8)
-    for (x, y) in path:
-        img[y, x] = 255
+    if compact_graph is not None:
+        path = expand_compact_path(compact_graph, path)
+    pixels = np.array(path, dtype=np.int64).reshape(-1, 2)
+    img[pixels[:, 1], pixels[:, 0]] = 255
     cv2.imwrite(save_path, img)
     print(f"主骨架线二值图已保存至 {save_path}")
     return img
 
-def main(input_binary_crack_img, save_connected_path, save_longest_path_img):
-    # 1. 骨架化
-    skeleton = extract_skeleton(input_binary_crack_img)
+def main(input_binary_crack_img, save_connected_path, save_longest_path_img,
+         path_method='pairwise', backend='networkx', spur_length=0, bridge='column',
+         tile_size=None):
+    # 1. 骨架化（给定 tile_size 时分块处理，否则只处理各前景分量的外接框）
+    if tile_size:
+        skeleton = extract_skeleton_tiled(input_binary_crack_img, tile_size=tile_size, workers=4)
+    else:
+        skeleton, _ = extract_skeleton_roi(input_binary_crack_img)
 
-    # 2. 逐列搜索连接断裂
-    connected = connect_by_column_search(skeleton, max_search_cols=50)
+    # 2. 连接断裂：'kdtree' 按端点邻近与方向连接，'column' 逐列搜索
+    if bridge == 'kdtree':
+        connected = bridge_endpoints_kdtree(skeleton, max_dist=50)
+    else:
+        connected = connect_by_column_search(skeleton, max_search_cols=50)
     cv2.imwrite(save_connected_path, connected)
     print(f"断裂修复后骨架已保存至 {save_connected_path}")
 
-    # 3. 提取主骨架线
-    G = skeleton_to_graph(connected)
-    longest_path = extract_longest_path(G)
-    print(f"最长主骨架线长度: {len(longest_path)}")
+    # 3. 提取主骨架线（只在骨架外接框内建图，坐标偏移回原图）
+    roi, offset = crop_to_content(connected)
+    compact_graph = None
+    if backend == 'csgraph':
+        coords, adj = skeleton_to_csr(roi, offset)
+        longest_path = extract_longest_path_csr(coords, adj)
+        path_length = len(longest_path)
+    elif backend == 'compact':
+        compact_graph = compact_skeleton_graph(skeleton_to_graph(roi, offset))
+        if spur_length > 0:
+            prune_spurs(compact_graph, spur_length)
+        longest_path = extract_longest_path_compact(compact_graph)
+        path_length = len(expand_compact_path(compact_graph, longest_path))
+    else:
+        G = skeleton_to_graph(roi, offset)
+        longest_path = extract_longest_path(G, method=path_method)
+        path_length = len(longest_path)
+    print(f"最长主骨架线长度: {path_length}")
 
     # 4. 创建主骨架线二值图
-    longest_path_img = save_longest_path_as_image(connected.shape, longest_path, save_longest_path_img)
+    longest_path_img = save_longest_path_as_image(connected.shape, longest_path, save_longest_path_img,
+                                                  compact_graph=compact_graph)
 
     # 5. 可视化对比
     plt.figure(figsize=(15,5))
@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path_for(path, read_kwargs=None):
+    """
+    Excel 表格对应的缓存文件：与原文件同目录，文件名加 .cache.npz 后缀
+    给定 pd.read_excel 参数（sheet_name、header 等）时，文件名再加上参数的哈希，不同参数各自缓存
+    """
+    if not read_kwargs:
+        return f"{path}.cache.npz"
+    tag = hashlib.sha1(repr(sorted(read_kwargs.items())).encode('utf-8')).hexdigest()[:12]
+    return f"{path}.{tag}.cache.npz"
+
+
+def is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def frame_to_table(df):
+    """
+    DataFrame -> (float 数组, 列名列表)，非数值单元格为 nan
+    """
+    values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    return values, [str(c) for c in df.columns]
+
+
+def load_excel_cached(path, **read_kwargs):
+    """
+    只在第一次（或文件修改后）用 pd.read_excel 解析，结果缓存为二进制 .npz
+    缓存以文件 mtime 与 SHA-1 为键：mtime 未变直接读缓存；mtime 变了但内容哈希相同也复用缓存；
+    read_kwargs 不同的读取使用不同的缓存文件
+    """
+    cache_path = cache_path_for(path, read_kwargs)
+    mtime = os.path.getmtime(path)
+    digest = None
+
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cache:
+            if float(cache['mtime']) == mtime:
+                return cache['values'], cache['columns'].tolist()
+            digest = file_digest(path)
+            if str(cache['sha1']) == digest:
+                values, columns = cache['values'], cache['columns'].tolist()
+                np.savez(cache_path, values=values, columns=np.array(columns), mtime=mtime, sha1=digest)
+                return values, columns
+
+    values, columns = frame_to_table(pd.read_excel(path, **read_kwargs))
+    np.savez(cache_path, values=values, columns=np.array(columns), mtime=mtime, sha1=digest or file_digest(path))
+    return values, columns
+
+
+def load_table(path):
+    """
+    按扩展名读取坐标表，返回 (float 数组 (N, M), 列名列表)
+        .csv / .txt:    逗号分隔，pd.read_csv（C 解析器）；首行含非数值时视为表头
+        .npy:           np.load
+        .npz:           取 'points' 数组，没有时取第一个数组
+        .parquet:       pd.read_parquet
+        .xlsx / .xls:   load_excel_cached，首次解析后使用二进制缓存
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.xlsx', '.xls'):
+        return load_excel_cached(path)
+    if ext == '.npy':
+        values = np.load(path)
+    elif ext == '.npz':
+        with np.load(path) as data:
+            values = data['points'] if 'points' in data.files else data[data.files[0]]
+    elif ext == '.parquet':
+        return frame_to_table(pd.read_parquet(path))
+    elif ext in ('.csv', '.txt'):
+        with open(path, 'r', encoding='utf-8') as f:
+            first = f.readline().strip().split(',')
+        header = 0 if not all(is_number(cell) for cell in first) else None
+        return frame_to_table(pd.read_csv(path, header=header, float_precision='round_trip'))
+    else:
+        raise ValueError(f"不支持的文件格式: {ext}")
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    return values, [str(i) for i in range(values.shape[1])]
+
+
+def load_points(path):
+    """
+    读取坐标表的前两列 (x, y)，返回 (N, 2) 数组
+    """
+    values, _ = load_table(path)
+    return values[:, :2]
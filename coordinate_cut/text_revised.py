@@ -1,3 +1,9 @@
+import glob
+import os
+
+import numpy as np
+
+
 def multiply_values_in_txt(input_file, output_file, multiplier=0.012537):
     """
     将文本文件中的所有数值乘以指定乘数
@@ -35,13 +41,74 @@ def multiply_values_in_txt(input_file, output_file, multiplier=0.012537):
         print(f"处理文件时出错: {str(e)}")
 
 
+def multiply_values_in_txt_array(input_file, output_file, multiplier=0.012537, delimiter=','):
+    """
+    向量化版本：用 np.loadtxt 一次读入所有数值列，整体乘以乘数后一次写出，
+    输出与 multiply_values_in_txt 逐字节相同（保留6位小数，空行原样保留）
+    文件中含非数值内容时退回逐项处理的 multiply_values_in_txt
+
+    返回: 处理的行数；找不到输入文件时返回 None
+    """
+    try:
+        with open(input_file, 'r') as infile:
+            lines = infile.read().splitlines()
+    except FileNotFoundError:
+        print(f"错误：找不到输入文件 {input_file}")
+        return None
+
+    # 空行（含只有空白字符的行）在 multiply_values_in_txt 中输出为空行
+    blank = np.array([not line.strip() for line in lines], dtype=bool)
+    numeric_lines = [line for line, is_blank in zip(lines, blank) if not is_blank]
+    if not numeric_lines:
+        with open(output_file, 'w') as outfile:
+            outfile.write('\n' * len(lines))
+        return len(lines)
+    try:
+        values = np.loadtxt(numeric_lines, delimiter=delimiter, ndmin=2, comments=None)
+    except ValueError:
+        multiply_values_in_txt(input_file, output_file, multiplier)
+        return len(lines)
+
+    # 整个文件用一次格式化拼成字符串后一次写出，比 np.savetxt 逐行格式化更快
+    values = values * multiplier
+    row = delimiter.join(['%.6f'] * values.shape[1]) + '\n'
+    text = (row * len(values)) % tuple(values.ravel().tolist())
+    if blank.any():
+        out_lines = np.full(len(lines), '', dtype=object)
+        out_lines[~blank] = text.splitlines()
+        text = ''.join(line + '\n' for line in out_lines)
+    with open(output_file, 'w') as outfile:
+        outfile.write(text)
+    return len(lines)
+
+
+def multiply_values_in_dir(input_dir, output_dir=None, multiplier=0.012537, pattern='*.txt', suffix='_scaled'):
+    """
+    批量处理目录下的坐标文本文件，不等待键盘输入
+    输出文件名在原文件名基础上添加 suffix，默认保存在原目录；已带 suffix 的文件跳过
+
+    返回: 处理的文件数
+    """
+    output_dir = output_dir or input_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_files = 0
+    for input_file in sorted(glob.glob(os.path.join(input_dir, pattern))):
+        base, ext = os.path.splitext(os.path.basename(input_file))
+        if base.endswith(suffix):
+            continue
+        multiply_values_in_txt_array(input_file, os.path.join(output_dir, f"{base}{suffix}{ext}"), multiplier)
+        n_files += 1
+
+    print(f"处理完成！共 {n_files} 个文件，结果已保存到 {output_dir}")
+    return n_files
+
+
 if __name__ == "__main__":
     # 输入文件路径（替换为你的实际文件路径）
     input_txt = r"E:\pycharm_programs\coordinate_cut\DH\11_revised_skeleton_points.txt"
 
     # 输出文件路径（在原文件名基础上添加_scaled后缀）
-    import os
-
     base, ext = os.path.splitext(input_txt)
     output_txt = f"{base}_scaled{ext}"
 
@@ -49,4 +116,7 @@ if __name__ == "__main__":
     multiply_values_in_txt(input_txt, output_txt)
 
     # 等待用户按Enter键退出
-    input("按Enter键退出...")
\ No newline at end of file
+    input("按Enter键退出...")
+
+    # 批量处理整个结果目录（不等待键盘输入）
+    # multiply_values_in_dir(r"E:\pycharm_programs\coordinate_cut\DH")
\ No newline at end of file
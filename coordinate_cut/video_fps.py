@@ -1,13 +1,113 @@
 import cv2
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def video_to_frames(video_path, save_dir):
+def iter_video_frames(video_path, start=0, stop=None, step=1):
+    """
+    逐帧解码视频的生成器，帧只保存在内存中
+
+    :param video_path: 视频文件路径
+    :param start: 起始帧号
+    :param stop: 结束帧号（不含），None 表示到视频结尾
+    :param step: 帧间隔
+    :return: 依次产生 (帧号, 时间戳毫秒, BGR 帧)
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频文件: {video_path}")
+
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        frame_idx = start
+        while stop is None or frame_idx < stop:
+            # 跳过的帧只 grab 不解码
+            if (frame_idx - start) % step != 0:
+                if not cap.grab():
+                    break
+                frame_idx += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            yield frame_idx, timestamp_ms, frame
+            frame_idx += 1
+    finally:
+        cap.release()
+
+def encode_params(ext, quality):
+    """
+    不同输出格式对应的 cv2.imwrite 编码参数
+    """
+    ext = ext.lower()
+    if ext in ('jpg', 'jpeg'):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if ext == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    if ext == 'png':
+        # quality 0-100 映射到 PNG 压缩级别 9-0
+        return [cv2.IMWRITE_PNG_COMPRESSION, min(9, max(0, (100 - quality) // 11))]
+    return []
+
+def video_to_frames_concurrent(video_path, save_dir, workers=4, ext='jpg', quality=95,
+                               start=0, stop=None, step=1, queue_size=64, progress_every=500):
+    """
+    并发分帧：主线程解码，编码/写盘交给线程池（OpenCV 解码与编码都会释放 GIL）
+
+    :param workers: 编码/写盘线程数
+    :param ext: 输出格式 jpg / png / webp
+    :param quality: 输出质量 0-100
+    :param start, stop, step: 帧号范围，含义同 iter_video_frames
+    :param queue_size: 已解码但尚未写盘的帧数上限，限制内存占用
+    :param progress_every: 每处理多少帧打印一次进度
+    :return: 保存的帧数
+    """
+    os.makedirs(save_dir, exist_ok=True)
+    params = encode_params(ext, quality)
+    slots = threading.BoundedSemaphore(queue_size)
+    failed = []
+
+    def write(frame_filename, frame):
+        # 线程池中的异常不会自动抛出，这里捕获所有异常并记录，避免写盘失败被静默丢弃
+        try:
+            ok = cv2.imwrite(frame_filename, frame, params)
+            reason = "cv2.imwrite 返回 False"
+        except Exception as e:
+            ok = False
+            reason = str(e)
+        finally:
+            slots.release()
+        if not ok:
+            failed.append((frame_filename, reason))
+
+    n_frames = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for frame_idx, _, frame in iter_video_frames(video_path, start, stop, step):
+            slots.acquire()
+            frame_filename = os.path.join(save_dir, f"frame_{frame_idx:05d}.{ext}")
+            pool.submit(write, frame_filename, frame)
+            n_frames += 1
+            if progress_every and n_frames % progress_every == 0:
+                print(f"已解码 {n_frames} 帧（当前帧号 {frame_idx}）")
+
+    if failed:
+        print(f"{len(failed)} 帧保存失败，例如 {failed[0][0]}: {failed[0][1]}")
+    print(f"视频分帧完成，总帧数: {n_frames}")
+    return n_frames
+
+def video_to_frames(video_path, save_dir, workers=0, **kwargs):
     """
     将视频分解为图像帧并保存
 
     :param video_path: 视频文件路径
     :param save_dir: 输出帧图像保存目录
+    :param workers: 大于 0 时使用 video_to_frames_concurrent 并发分帧，kwargs 传给它
     """
+    if workers > 0:
+        return video_to_frames_concurrent(video_path, save_dir, workers=workers, **kwargs)
+
     # 创建保存目录
     os.makedirs(save_dir, exist_ok=True)
 
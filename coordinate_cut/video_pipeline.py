@@ -0,0 +1,127 @@
+import csv
+import os
+
+import cv2
+import numpy as np
+
+from coordinate_frame import load_coordinate_frame
+from crack_tracking import CrackTracker
+from endpoint_selection import select_endpoints, select_endpoints_along_path
+from frame_gating import gate_frames, save_skip_log
+from HU_coordinate_revised import rotate_coordinate_system
+from roi_crop import extract_skeleton_roi
+from video_fps import iter_video_frames
+
+
+def mask_loader(mask_dir, pattern="frame_{:05d}_mask.png"):
+    """
+    从目录按帧号读取已有的分割 mask，返回 mask_fn(frame_idx, frame)
+    找不到对应 mask 时返回 None，该帧跳过
+    """
+    def load(frame_idx, frame):
+        return cv2.imread(os.path.join(mask_dir, pattern.format(frame_idx)), cv2.IMREAD_GRAYSCALE)
+    return load
+
+
+def iter_masks(frames, mask_fn):
+    """
+    为每帧生成 mask：mask_fn(frame_idx, frame) 可以是 mask_loader，也可以是分割网络推理函数
+    """
+    for frame_idx, timestamp_ms, frame in frames:
+        mask = mask_fn(frame_idx, frame)
+        if mask is None:
+            continue
+        yield frame_idx, timestamp_ms, frame, mask
+
+
+def iter_crack_points(masked_frames, origin, x_dir, y_dir, interval=200, sampling='projection'):
+    """
+    对每帧 mask 骨架化并选取端点，全程在内存中进行
+    产生 (帧号, 时间戳毫秒, (M, 2) 端点坐标)
+    """
+    for frame_idx, timestamp_ms, frame, mask in masked_frames:
+        _, binary_img = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+        skeleton, points = extract_skeleton_roi(binary_img)
+        if len(points) == 0:
+            yield frame_idx, timestamp_ms, np.empty((0, 2))
+        elif sampling == 'arc_length':
+            yield frame_idx, timestamp_ms, select_endpoints_along_path(skeleton, origin, x_dir, y_dir, interval)
+        else:
+            yield frame_idx, timestamp_ms, select_endpoints(points, origin, x_dir, y_dir, interval)
+
+
+def write_measurements(results, save_csv_path):
+    """
+    将所有帧的端点坐标流式写入一个 CSV 表：frame, timestamp_ms, point, x, y
+    """
+    n_frames = 0
+    with open(save_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'timestamp_ms', 'point', 'x', 'y'])
+        for frame_idx, timestamp_ms, points in results:
+            writer.writerows((frame_idx, f"{timestamp_ms:.3f}", i, x, y) for i, (x, y) in enumerate(points.tolist()))
+            n_frames += 1
+    print(f"{n_frames} 帧的裂纹坐标已保存至 {save_csv_path}")
+    return n_frames
+
+
+def run_video_pipeline(video_path, mask_fn, frame_path, save_csv_path, interval=200, sampling='projection',
+                       start=0, stop=None, step=1, gate=False, skip_log_path=None, **gate_kwargs):
+    """
+    视频解码 -> mask（读取或推理）-> 骨架化 -> 端点选取，全部以生成器串联在内存中完成，
+    不再把每帧写成 JPEG 再读回，只写出最终的坐标表
+    frame_path: coordinate_frame 保存的坐标系文件（同一相机的视频共用一个）
+    gate:       在 mask 之前用 gate_frames 跳过模糊帧与重复帧，gate_kwargs 传给 gate_frames，
+                skip_log_path 给定时保存跳过帧记录
+    """
+    origin, x_dir, y_dir, rotation_deg = load_coordinate_frame(frame_path)
+    if rotation_deg:
+        x_dir, y_dir = rotate_coordinate_system(x_dir, y_dir, rotation_deg)
+
+    frames = iter_video_frames(video_path, start, stop, step)
+    skip_log = []
+    if gate:
+        frames = gate_frames(frames, skip_log=skip_log, **gate_kwargs)
+    masked = iter_masks(frames, mask_fn)
+    results = iter_crack_points(masked, origin, x_dir, y_dir, interval, sampling)
+    n_frames = write_measurements(results, save_csv_path)
+
+    if gate and skip_log_path is not None:
+        save_skip_log(skip_log, skip_log_path)
+    return n_frames
+
+
+def run_tracking_pipeline(video_path, mask_fn, frame_path, save_csv_path, start=0, stop=None, step=1, **tracker_kwargs):
+    """
+    逐帧跟踪裂纹尖端：坐标系随帧间单应矩阵更新，骨架化只在上一帧主骨架线附近进行
+    输出表：frame, timestamp_ms, registered, tip_x, tip_y, origin_x, origin_y, x_dir_x, x_dir_y
+    tracker_kwargs 传给 CrackTracker
+    """
+    origin, x_dir, y_dir, rotation_deg = load_coordinate_frame(frame_path)
+    if rotation_deg:
+        x_dir, y_dir = rotate_coordinate_system(x_dir, y_dir, rotation_deg)
+    tracker = CrackTracker(origin, x_dir, y_dir, **tracker_kwargs)
+
+    masked = iter_masks(iter_video_frames(video_path, start, stop, step), mask_fn)
+    n_frames = 0
+    with open(save_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'timestamp_ms', 'registered', 'tip_x', 'tip_y',
+                         'origin_x', 'origin_y', 'x_dir_x', 'x_dir_y'])
+        for frame_idx, timestamp_ms, frame, mask in masked:
+            _, tip = tracker.update(frame_idx, frame, mask)
+            tip_x, tip_y = ('', '') if tip is None else tip
+            writer.writerow((frame_idx, f"{timestamp_ms:.3f}", int(tracker.trajectory[-1][1]), tip_x, tip_y,
+                             *tracker.origin, *tracker.x_dir))
+            n_frames += 1
+    print(f"{n_frames} 帧的裂纹尖端轨迹已保存至 {save_csv_path}")
+    return tracker.trajectory
+
+
+if __name__ == "__main__":
+    video_path = r"C:\Users\GHB\Desktop\video1.mp4"
+    mask_dir = r"C:\Users\GHB\Desktop\test_video_masks"
+    frame_path = r"C:\Users\GHB\Desktop\video1_frame.json"
+    save_csv_path = r"C:\Users\GHB\Desktop\video1_crack_points.csv"
+
+    run_video_pipeline(video_path, mask_loader(mask_dir), frame_path, save_csv_path)